@@ -3,91 +3,45 @@
 from __future__ import annotations
 
 import logging
+import threading
 
 # Bump this when the chunking algorithm changes to force re-indexing.
-CHUNKER_VERSION = "ts1"
+CHUNKER_VERSION = "ts4"
 
 logger = logging.getLogger(__name__)
 
-# Tree-sitter node types that represent top-level definitions per language.
-# When walking the AST we collect these as "semantic units" for chunking.
-_DEFINITION_TYPES: dict[str, set[str]] = {
-    "python": {
-        "function_definition",
-        "class_definition",
-        "decorated_definition",
-        "import_statement",
-        "import_from_statement",
-    },
-    "c_sharp": {
-        "class_declaration",
-        "struct_declaration",
-        "interface_declaration",
-        "enum_declaration",
-        "method_declaration",
-        "namespace_declaration",
-        "using_directive",
-    },
-    "rust": {
-        "function_item",
-        "struct_item",
-        "enum_item",
-        "impl_item",
-        "trait_item",
-        "mod_item",
-        "use_declaration",
-    },
-    "typescript": {
-        "function_declaration",
-        "class_declaration",
-        "interface_declaration",
-        "type_alias_declaration",
-        "export_statement",
-        "import_statement",
-        "lexical_declaration",
-    },
-    "tsx": {
-        "function_declaration",
-        "class_declaration",
-        "interface_declaration",
-        "type_alias_declaration",
-        "export_statement",
-        "import_statement",
-        "lexical_declaration",
-    },
-    "javascript": {
-        "function_declaration",
-        "class_declaration",
-        "export_statement",
-        "import_statement",
-        "lexical_declaration",
-    },
-    "gdscript": {
-        "function_definition",
-        "class_definition",
-        "variable_statement",
-        "signal_statement",
-    },
-}
+# Languages whose top-level named nodes are the semantic units for chunking: definitions,
+# imports, comments and module-level statements. Other languages use every top-level child.
+_SEMANTIC_LANGUAGES = frozenset({"python", "c_sharp", "rust", "typescript", "tsx", "javascript", "gdscript"})
 
 # Cache: languages we've already tried to load.
 # Maps language name -> True (available) or False (unavailable).
 _LANGUAGE_CACHE: dict[str, bool] = {}
 
+# Parsers built so far, per thread: a tree-sitter Parser must not be shared across threads.
+_PARSERS = threading.local()
+
 
 def _get_parser(language: str):
-    """Try to get a tree-sitter parser. Returns None if unavailable."""
-    if language in _LANGUAGE_CACHE and not _LANGUAGE_CACHE[language]:
+    """Try to get this thread's tree-sitter parser for *language*. Returns None if unavailable."""
+    parsers = getattr(_PARSERS, "by_language", None)
+    if parsers is None:
+        parsers = _PARSERS.by_language = {}
+    parser = parsers.get(language)
+    if parser is not None:
+        return parser
+    if _LANGUAGE_CACHE.get(language) is False:
         return None
     try:
         from tree_sitter_language_pack import get_parser
 
         parser = get_parser(language)
-        _LANGUAGE_CACHE[language] = True
-        return parser
     except Exception:
         _LANGUAGE_CACHE[language] = False
         return None
+    _LANGUAGE_CACHE[language] = True
+    parsers[language] = parser
+    return parser
 
 
 def _validate_chunk_params(chunk_size: int, chunk_overlap: int) -> None:
@@ -108,7 +62,9 @@ def split_simple(content: str, chunk_size: int, chunk_overlap: int) -> list[dict
     while start < len(content):
         end = min(start + chunk_size, len(content))
         if end < len(content):
-            nl = content.rfind("\n", start, end)
+            # Only snap to a newline that leaves progress past the overlap; snapping to one
+            # closer to start would make the next window re-find it and crawl forward by 1.
+            nl = content.rfind("\n", start + chunk_overlap, end)
             if nl > start:
                 end = nl + 1
         text = content[start:end]
@@ -122,75 +78,91 @@ def split_simple(content: str, chunk_size: int, chunk_overlap: int) -> list[dict
 
 def _collect_top_level_nodes(root_node, language: str) -> list:
     """Collect top-level AST nodes that are semantic definitions."""
-    def_types = _DEFINITION_TYPES.get(language, set())
-    if not def_types:
-        # No definition types configured — treat all top-level children as units
+    if language not in _SEMANTIC_LANGUAGES:
+        # Not a known language — treat all top-level children as units
         return list(root_node.children)
-    nodes = []
-    for child in root_node.children:
-        if child.type in def_types:
-            nodes.append(child)
-        elif child.type in ("comment", "expression_statement"):
-            # Include module-level comments and expressions (e.g., docstrings)
-            nodes.append(child)
-        elif child.is_named:
-            # Preserve other semantic top-level constructs (e.g., const, macro, global vars)
-            nodes.append(child)
-    return nodes
-
-
-def split_ast(content: str, language: str, chunk_size: int, chunk_overlap: int) -> list[dict] | None:
+    # Definitions, module-level comments and expressions (e.g., docstrings) are all named nodes,
+    # and other named constructs (const, macro, global vars) are preserved too, so the filter
+    # is exactly the named children — selected in C rather than per node in Python.
+    return root_node.named_children
+
+
+def _parse_spans(language: str, source: bytes) -> tuple[tuple[int, int], ...] | None:
+    """Return (start_byte, end_byte) spans of the top-level semantic nodes in *source*.
+
+    Returns None if tree-sitter is unavailable for this language.
+    """
+    parser = _get_parser(language)
+    if parser is None:
+        return None
+    tree = parser.parse(source)
+    return tuple((node.start_byte, node.end_byte) for node in _collect_top_level_nodes(tree.root_node, language))
+
+
+def _char_spans(source: bytes, spans: tuple[tuple[int, int], ...]) -> list[tuple[int, int]]:
+    """Convert (start_byte, end_byte) spans over UTF-8 *source* into character offsets."""
+    char_spans: list[tuple[int, int]] = []
+    pos = chars = 0
+    for start_byte, end_byte in spans:
+        chars += len(source[pos:start_byte].decode("utf-8", errors="replace"))
+        start_char = chars
+        chars += len(source[start_byte:end_byte].decode("utf-8", errors="replace"))
+        char_spans.append((start_char, chars))
+        pos = end_byte
+    return char_spans
+
+
+def split_ast(
+    content: str, language: str, chunk_size: int, chunk_overlap: int, source: bytes | None = None
+) -> list[dict] | None:
     """AST-aware chunking using tree-sitter.
 
     Returns a list of chunk dicts, or None if tree-sitter is unavailable for this language.
     Each chunk dict has 'text' and 'location' (format: "chunk_idx:start_byte").
-    Chunks group consecutive AST nodes together up to chunk_size, keeping definitions intact.
+    Chunks group consecutive AST nodes together up to chunk_size characters, keeping definitions intact.
     If a single definition exceeds chunk_size, it gets its own chunk (not split mid-AST-node).
+    Pass source when the caller already holds the UTF-8 bytes of content, to skip re-encoding.
     """
-    parser = _get_parser(language)
-    if parser is None:
+    if source is None:
+        source = content.encode("utf-8")
+    spans = _parse_spans(language, source)
+    if spans is None:
         return None
 
-    source = content.encode("utf-8")
-    tree = parser.parse(source)
-    nodes = _collect_top_level_nodes(tree.root_node, language)
-
-    if not nodes:
+    if not spans:
         return split_simple(content, chunk_size, chunk_overlap)
 
+    # Top-level nodes are contiguous, so each chunk is one slice of the source from its first
+    # node's start to its last node's end, decoded once. chunk_size counts characters, so the
+    # size check uses character offsets, which equal the byte offsets for ASCII sources.
+    char_spans = spans if source.isascii() else _char_spans(source, spans)
     chunks: list[dict] = []
-    current_texts: list[str] = []
-    current_size = 0
-    current_start_byte = nodes[0].start_byte if nodes else 0
+    chunk_start, chunk_end = spans[0]
+    chunk_start_char = char_spans[0][0]
     idx = 0
 
-    for node in nodes:
-        node_text = source[node.start_byte : node.end_byte].decode("utf-8", errors="replace")
-        node_len = len(node_text)
-
-        if current_size > 0 and current_size + node_len > chunk_size:
+    for (start_byte, end_byte), (start_char, end_char) in zip(spans[1:], char_spans[1:], strict=True):
+        if end_char - chunk_start_char > chunk_size:
             # Flush current group
-            text = "\n".join(current_texts)
+            text = source[chunk_start:chunk_end].decode("utf-8", errors="replace")
             if text.strip():
-                chunks.append({"text": text, "location": f"{idx}:{current_start_byte}"})
+                chunks.append({"text": text, "location": f"{idx}:{chunk_start}"})
                 idx += 1
-            current_texts = []
-            current_size = 0
-            current_start_byte = node.start_byte
-
-        current_texts.append(node_text)
-        current_size += node_len
+            chunk_start = start_byte
+            chunk_start_char = start_char
+        chunk_end = end_byte
 
     # Flush remaining
-    if current_texts:
-        text = "\n".join(current_texts)
-        if text.strip():
-            chunks.append({"text": text, "location": f"{idx}:{current_start_byte}"})
+    text = source[chunk_start:chunk_end].decode("utf-8", errors="replace")
+    if text.strip():
+        chunks.append({"text": text, "location": f"{idx}:{chunk_start}"})
 
     return chunks if chunks else split_simple(content, chunk_size, chunk_overlap)
 
 
-def chunk_file(content: str, language: str | None, chunk_size: int, chunk_overlap: int) -> list[dict]:
+def chunk_file(
+    content: str, language: str | None, chunk_size: int, chunk_overlap: int, source: bytes | None = None
+) -> list[dict]:
     """Chunk a file using AST-aware splitting when possible, falling back to simple splitting.
 
     Args:
@@ -198,13 +170,14 @@ def chunk_file(content: str, language: str | None, chunk_size: int, chunk_overla
         language: Tree-sitter language name (e.g., "python"), or None for plain text.
         chunk_size: Target maximum chunk size in characters.
         chunk_overlap: Overlap between consecutive chunks (used by simple splitter only).
+        source: The UTF-8 bytes content was decoded from, if already at hand.
 
     Returns:
         List of chunk dicts with 'text' and 'location' keys.
     """
     _validate_chunk_params(chunk_size, chunk_overlap)
     if language:
-        result = split_ast(content, language, chunk_size, chunk_overlap)
+        result = split_ast(content, language, chunk_size, chunk_overlap, source)
         if result is not None:
             return result
     return split_simple(content, chunk_size, chunk_overlap)
@@ -19,7 +19,7 @@ def main():
 @click.option("--db", default=None, help="SQLite database path")
 @click.option("--chunk-size", default=1000, help="Max chunk size in characters")
 @click.option("--chunk-overlap", default=300, help="Overlap between chunks")
-@click.option("--batch-size", default=32, help="Embedding batch size")
+@click.option("--batch-size", default=256, help="Chunks embedded and written per batch")
 def index(source_path: str, db: str | None, chunk_size: int, chunk_overlap: int, batch_size: int):
     """Index a codebase directory into SQLite with vector embeddings."""
     from memory_sidecar.config import codebase_db_path
@@ -61,8 +61,12 @@ def search(query_text: str, db: str | None, top_k: int, json_out: bool):
 @click.option("--db", default=None, help="SQLite database path")
 @click.option("--chunk-size", default=1000, help="Max chunk size in characters")
 @click.option("--chunk-overlap", default=300, help="Overlap between chunks")
-@click.option("--batch-size", default=32, help="Embedding batch size")
-def index_docs(docs_path: str, db: str | None, chunk_size: int, chunk_overlap: int, batch_size: int):
+@click.option("--batch-size", default=256, help="Chunks embedded and written per batch")
+@click.option("--workers", default=1, help="Parallel Docling conversion processes")
+@click.option("--fast", is_flag=True, help="Skip OCR and use fast table recognition for PDFs")
+def index_docs(
+    docs_path: str, db: str | None, chunk_size: int, chunk_overlap: int, batch_size: int, workers: int, fast: bool
+):
     """Index a documents directory (PDF, DOCX, PPTX, etc.) via Docling conversion."""
     try:
         import docling  # noqa: F401
@@ -75,7 +79,7 @@ def index_docs(docs_path: str, db: str | None, chunk_size: int, chunk_overlap: i
 
     db_path = db or str(codebase_db_path())
     click.echo(f"Indexing documents {docs_path} -> {db_path}")
-    stats = index_documents(docs_path, db_path, chunk_size, chunk_overlap, batch_size)
+    stats = index_documents(docs_path, db_path, chunk_size, chunk_overlap, batch_size, workers, fast)
     click.echo(json.dumps(stats, indent=2))
 
 
@@ -85,7 +89,7 @@ def embed(text: str):
     """Generate an embedding vector for a text string. Outputs JSON array."""
     from memory_sidecar.embed import embed_one
 
-    json.dump(embed_one(text), sys.stdout)
+    json.dump(embed_one(text).tolist(), sys.stdout)
     sys.stdout.write("\n")
 
 
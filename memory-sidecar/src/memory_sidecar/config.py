@@ -6,8 +6,14 @@ import os
 from pathlib import Path
 
 # ── Embedding model ──
+# FastEmbed serves this model from Qdrant's quantized ONNX export (Qdrant/bge-small-en-v1.5-onnx-Q),
+# so inference already runs on the quantized weights; keep any replacement at EMBED_DIMENSIONS.
 DEFAULT_EMBED_MODEL = "BAAI/bge-small-en-v1.5"
 EMBED_DIMENSIONS = 384
+# Texts per ONNX forward pass. Each pass is padded to its longest text, so embed_texts sorts
+# by length first; callers flush larger batches (DEFAULT_INDEX_BATCH_SIZE) to bucket within.
+EMBED_BATCH_SIZE = 32
+DEFAULT_INDEX_BATCH_SIZE = 256
 
 # ── Chunking ──
 DEFAULT_CHUNK_SIZE = 1000
@@ -60,6 +66,15 @@ def data_dir() -> Path:
     return Path(os.environ.get("MEMORY_SIDECAR_DATA_DIR", "data/memory"))
 
 
+def embed_threads() -> int | None:
+    """ONNX Runtime intra-op threads for the embedder. Respects MEMORY_SIDECAR_EMBED_THREADS env var.
+
+    None leaves the choice to ONNX Runtime, which uses one thread per physical core.
+    """
+    value = os.environ.get("MEMORY_SIDECAR_EMBED_THREADS")
+    return int(value) if value else None
+
+
 def codebase_db_path() -> Path:
     return data_dir() / "codebase.sqlite"
 
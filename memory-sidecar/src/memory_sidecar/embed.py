@@ -2,27 +2,65 @@
 
 from __future__ import annotations
 
-from memory_sidecar.config import DEFAULT_EMBED_MODEL
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from memory_sidecar.config import DEFAULT_EMBED_MODEL, EMBED_BATCH_SIZE, EMBED_DIMENSIONS, embed_threads
 
 _model = None
 
+# LRU of embeddings keyed by text digest, so repeated chunks (license headers, boilerplate,
+# unchanged re-stored knowledge) skip the model. Bounded at ~6 MB of float32 vectors.
+_EMBED_CACHE_SIZE = 4096
+_EMBED_CACHE: OrderedDict[bytes, np.ndarray] = OrderedDict()
+_EMBED_CACHE_LOCK = threading.Lock()
+
 
 def _get_model():
     global _model
     if _model is None:
         from fastembed import TextEmbedding
 
-        _model = TextEmbedding(model_name=DEFAULT_EMBED_MODEL)
+        _model = TextEmbedding(model_name=DEFAULT_EMBED_MODEL, threads=embed_threads())
     return _model
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
-    """Generate embeddings for a batch of texts using FastEmbed ONNX runtime."""
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """Generate embeddings for a batch of texts using FastEmbed ONNX runtime.
+
+    Identical texts are embedded once, and recently embedded texts are served from cache.
+    The rest are run in order of length, so each forward pass pads to a similar length.
+    Returns a float32 array of shape (len(texts), EMBED_DIMENSIONS).
+    """
+    out = np.empty((len(texts), EMBED_DIMENSIONS), dtype=np.float32)
+    missing: dict[bytes, list[int]] = {}
+    keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+    with _EMBED_CACHE_LOCK:
+        for i, key in enumerate(keys):
+            vec = _EMBED_CACHE.get(key)
+            if vec is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                _EMBED_CACHE.move_to_end(key)
+                out[i] = vec
+    if not missing:
+        return out
+
+    todo = sorted(missing.items(), key=lambda item: len(texts[item[1][0]]))
     model = _get_model()
-    embeddings = list(model.embed(texts))
-    return [e.tolist() for e in embeddings]
+    vecs = np.stack(list(model.embed([texts[rows[0]] for _, rows in todo], batch_size=EMBED_BATCH_SIZE)))
+    with _EMBED_CACHE_LOCK:
+        for (key, rows), vec in zip(todo, vecs, strict=True):
+            out[rows] = vec
+            _EMBED_CACHE[key] = out[rows[0]].copy()
+            if len(_EMBED_CACHE) > _EMBED_CACHE_SIZE:
+                _EMBED_CACHE.popitem(last=False)
+    return out
 
 
-def embed_one(text: str) -> list[float]:
+def embed_one(text: str) -> np.ndarray:
     """Generate embedding for a single text."""
     return embed_texts([text])[0]
@@ -2,22 +2,35 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from memory_sidecar.chunking import CHUNKER_VERSION, chunk_file
-from memory_sidecar.config import CODE_EXTENSIONS, DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, EXCLUDED_PATTERNS
+from memory_sidecar.config import (
+    CODE_EXTENSIONS,
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_INDEX_BATCH_SIZE,
+    EXCLUDED_PATTERNS,
+)
 from memory_sidecar.embed import embed_texts
 from memory_sidecar.storage import (
     connect,
-    delete_stale_chunks,
+    delete_chunks_by_id,
+    get_file_chunks,
+    get_file_hashes,
     get_metadata,
     init_codebase_schema,
     init_metadata_schema,
     purge_all_code_chunks,
+    set_file_hashes,
     set_metadata,
-    upsert_code_chunk,
+    upsert_code_chunks,
 )
 
 logger = logging.getLogger(__name__)
@@ -40,39 +53,115 @@ _EXT_MAP = {
     ".gdscript": "gdscript",
 }
 
-
-def _should_include(path: Path, source_root: Path) -> bool:
-    """Check if a file should be included in indexing."""
-    rel = path.relative_to(source_root)
-    for part in rel.parts:
-        if part in EXCLUDED_PATTERNS or part.startswith("."):
-            return False
-    return path.suffix.lower() in CODE_EXTENSIONS
+# str.endswith takes a tuple and tests every suffix in C, cheaper than slicing out the extension.
+_CODE_SUFFIXES = tuple(sorted(CODE_EXTENSIONS))
 
 
 def _walk_source_files(source_root: Path) -> list[Path]:
-    """Walk source tree, pruning excluded directories in-place for performance."""
+    """Walk source tree with os.scandir, pruning excluded and hidden directories before descent.
+
+    Filters on DirEntry names directly instead of building a Path per entry. Order matches a
+    top-down os.walk with sorted names: a directory's files, then its subdirectories.
+    """
     result: list[Path] = []
-    for dirpath, dirnames, filenames in os.walk(source_root):
-        # Prune excluded dirs in-place to prevent descent
-        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_PATTERNS and not d.startswith("."))
-        for fname in sorted(filenames):
-            file_path = Path(dirpath) / fname
-            if _should_include(file_path, source_root):
-                result.append(file_path)
+    stack = [str(source_root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs: list[str] = []
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if name not in EXCLUDED_PATTERNS:
+                    subdirs.append(entry.path)
+            elif entry.is_file() and name.lower().endswith(_CODE_SUFFIXES):
+                result.append(Path(entry.path))
+        stack.extend(reversed(subdirs))
     return result
 
 
+def _content_hash(data: bytes, chunk_size: int, chunk_overlap: int) -> bytes:
+    """Hash raw file bytes together with the chunking parameters that shaped its stored chunks."""
+    h = hashlib.blake2b(f"{chunk_size}:{chunk_overlap}:".encode(), digest_size=16)
+    h.update(data)
+    return h.digest()
+
+
+def _read_and_chunk(
+    file_path: Path, stored_hash: bytes | None, chunk_size: int, chunk_overlap: int
+) -> tuple[bytes | None, list[dict] | None]:
+    """Read, hash and chunk one source file.
+
+    Returns (content_hash, chunks). The hash is None if the file is unreadable. Chunks are None
+    if the file is blank or its hash equals stored_hash, in which case parsing is skipped.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None, None
+    digest = _content_hash(data, chunk_size, chunk_overlap)
+    if digest == stored_hash:
+        return digest, None
+    try:
+        content = data.decode("utf-8")
+        source = data
+    except UnicodeDecodeError:
+        # The chunker expects source to be exactly content's encoding, so let it re-encode
+        content = data.decode("utf-8", errors="replace")
+        source = None
+    if not content.strip():
+        return digest, None
+    ts_lang = _EXT_MAP.get(file_path.suffix.lower())
+    return digest, chunk_file(content, ts_lang, chunk_size, chunk_overlap, source)
+
+
+def _iter_chunked_files(
+    files: list[tuple[Path, bytes | None]], chunk_size: int, chunk_overlap: int
+) -> Iterator[tuple[Path, bytes | None, list[dict] | None]]:
+    """Yield (file_path, content_hash, chunks) in input order, reading and chunking ahead on a thread pool.
+
+    Each input pairs a file with its stored content hash. Reading and parsing overlap with
+    embedding on the caller's thread. At most two files per worker are in flight, so memory
+    stays bounded when the embedder is the bottleneck.
+    """
+    workers = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight: deque = deque()
+        for file_path, stored_hash in files:
+            future = pool.submit(_read_and_chunk, file_path, stored_hash, chunk_size, chunk_overlap)
+            in_flight.append((file_path, future))
+            if len(in_flight) >= 2 * workers:
+                path, future = in_flight.popleft()
+                yield path, *future.result()
+        while in_flight:
+            path, future = in_flight.popleft()
+            yield path, *future.result()
+
+
+def _relative_name(file_path: Path, source_root: Path) -> str:
+    return str(file_path.relative_to(source_root)).replace("\\", "/")
+
+
 def index_codebase(
     source_path: str,
     db_path: str,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
-    batch_size: int = 32,
+    batch_size: int = DEFAULT_INDEX_BATCH_SIZE,
 ) -> dict:
     """Index a codebase directory into SQLite with vector embeddings.
 
-    Returns stats dict with files_processed, chunks_indexed, chunks_deleted.
+    Files whose content hash matches the one stored at their last index are skipped without
+    parsing. Within a changed file, chunks whose text is already stored at the same location
+    are not re-embedded, so re-indexing an edit costs roughly the edited chunks.
+
+    Returns stats dict with files_processed, files_unchanged, chunks_indexed, chunks_unchanged, chunks_deleted.
     """
     source_root = Path(source_path).resolve()
     if not source_root.is_dir():
@@ -82,7 +171,14 @@ def index_codebase(
     init_metadata_schema(conn)
     init_codebase_schema(conn)
 
-    stats = {"files_processed": 0, "chunks_indexed": 0, "chunks_deleted": 0, "chunks_purged": 0}
+    stats = {
+        "files_processed": 0,
+        "files_unchanged": 0,
+        "chunks_indexed": 0,
+        "chunks_unchanged": 0,
+        "chunks_deleted": 0,
+        "chunks_purged": 0,
+    }
 
     # Check chunker version — purge all chunks on mismatch to avoid stale vec0 entries
     stored_version = get_metadata(conn, "chunker_version")
@@ -96,39 +192,49 @@ def index_codebase(
         set_metadata(conn, "chunker_version", CHUNKER_VERSION)
         conn.commit()
 
-    files = _walk_source_files(source_root)
+    stored_hashes = get_file_hashes(conn)
+    files = [(p, stored_hashes.get(_relative_name(p, source_root))) for p in _walk_source_files(source_root)]
 
     pending: list[tuple[str, str, str | None, str]] = []  # (filename, location, lang, code)
     pending_texts: list[str] = []
+    # Hashes are written only once the file's chunks are flushed, so an interrupted run
+    # never marks a partially stored file as up to date.
+    pending_hashes: list[tuple[str, bytes]] = []
 
-    for file_path in files:
-        rel = str(file_path.relative_to(source_root)).replace("\\", "/")
-        lang = _EXT_MAP.get(file_path.suffix.lower(), file_path.suffix.lstrip("."))
-        try:
-            content = file_path.read_text(encoding="utf-8", errors="replace")
-        except OSError:
+    for file_path, digest, chunks in _iter_chunked_files(files, chunk_size, chunk_overlap):
+        if digest is None:
             continue
-        if not content.strip():
+        rel = _relative_name(file_path, source_root)
+        if digest == stored_hashes.get(rel):
+            stats["files_unchanged"] += 1
             continue
-
-        ts_lang = _EXT_MAP.get(file_path.suffix.lower())
-        chunks = chunk_file(content, ts_lang, chunk_size, chunk_overlap)
+        if chunks is None:
+            continue
+        lang = _EXT_MAP.get(file_path.suffix.lower(), file_path.suffix.lstrip("."))
+        existing = get_file_chunks(conn, rel)
         keep = {c["location"] for c in chunks}
-        stats["chunks_deleted"] += delete_stale_chunks(conn, rel, keep)
+        stale = [row_id for location, (row_id, _) in existing.items() if location not in keep]
+        stats["chunks_deleted"] += delete_chunks_by_id(conn, stale)
         stats["files_processed"] += 1
 
         for c in chunks:
+            stored = existing.get(c["location"])
+            if stored is not None and stored[1] == c["text"]:
+                stats["chunks_unchanged"] += 1
+                continue
             pending.append((rel, c["location"], lang, c["text"]))
             pending_texts.append(c["text"])
+        pending_hashes.append((rel, digest))
 
         if len(pending_texts) >= batch_size:
-            _flush(conn, pending, pending_texts)
+            _flush(conn, pending, pending_texts, pending_hashes)
             stats["chunks_indexed"] += len(pending_texts)
             pending.clear()
             pending_texts.clear()
+            pending_hashes.clear()
 
-    if pending_texts:
-        _flush(conn, pending, pending_texts)
+    if pending_texts or pending_hashes:
+        _flush(conn, pending, pending_texts, pending_hashes)
         stats["chunks_indexed"] += len(pending_texts)
 
     conn.commit()
@@ -136,10 +242,10 @@ def index_codebase(
     return stats
 
 
-def _flush(conn, chunks, texts):
-    embeddings = embed_texts(texts)
-    for (fn, loc, lang, code), emb in zip(chunks, embeddings, strict=True):
-        upsert_code_chunk(conn, fn, loc, lang, code, emb)
+def _flush(conn, chunks, texts, hashes):
+    if texts:
+        upsert_code_chunks(conn, chunks, embed_texts(texts))
+    set_file_hashes(conn, hashes)
 
 
 def search_codebase(db_path: str, query: str, top_k: int = 10) -> list[dict]:
@@ -2,32 +2,164 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
-from memory_sidecar.chunking import split_simple
-from memory_sidecar.config import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, DOC_EXTENSIONS
+from memory_sidecar.chunking import CHUNKER_VERSION, split_simple
+from memory_sidecar.config import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, DEFAULT_INDEX_BATCH_SIZE, DOC_EXTENSIONS
 from memory_sidecar.embed import embed_texts
-from memory_sidecar.storage import connect, delete_stale_chunks, init_codebase_schema, upsert_code_chunk
+from memory_sidecar.storage import (
+    connect,
+    delete_chunks_by_id,
+    get_file_chunks,
+    get_file_hashes,
+    init_codebase_schema,
+    set_file_hashes,
+    upsert_code_chunks,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def _convert_document(path: Path) -> str:
+# Docling loads its layout/table models when a converter is built, so keep one per mode
+# for the life of the process (each pool worker builds its own on first use).
+_converters: dict[bool, object] = {}
+_converters_lock = threading.Lock()
+
+
+def _get_converter(fast: bool = False):
+    """Return the process-wide DocumentConverter, building it on first use.
+
+    With fast=True, PDF OCR is disabled and tables use TableFormer's fast mode.
+    """
+    converter = _converters.get(fast)
+    if converter is not None:
+        return converter
+    with _converters_lock:
+        converter = _converters.get(fast)
+        if converter is None:
+            from docling.document_converter import DocumentConverter
+
+            if fast:
+                from docling.datamodel.base_models import InputFormat
+                from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+                from docling.document_converter import PdfFormatOption
+
+                options = PdfPipelineOptions(do_ocr=False)
+                options.table_structure_options.mode = TableFormerMode.FAST
+                converter = DocumentConverter(
+                    format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)}
+                )
+            else:
+                converter = DocumentConverter()
+            _converters[fast] = converter
+    return converter
+
+
+def _convert_document(path: Path, fast: bool = False) -> str:
     """Convert a document to markdown using Docling.
 
     Raises ImportError if docling is not installed.
     """
-    from docling.document_converter import DocumentConverter
-
-    converter = DocumentConverter()
-    result = converter.convert(str(path))
+    result = _get_converter(fast).convert(str(path))
     return result.document.export_to_markdown()
 
 
-def _should_include_doc(path: Path) -> bool:
-    """Check if a file has a supported document extension."""
-    return path.suffix.lower() in DOC_EXTENSIONS
+_DOC_SUFFIXES = tuple(sorted(DOC_EXTENSIONS))
+
+
+def _should_include_doc(name: str) -> bool:
+    """Check if a file name has a supported document extension."""
+    return name.lower().endswith(_DOC_SUFFIXES)
+
+
+def _walk_doc_files(docs_root: Path) -> list[Path]:
+    """Find supported document files under docs_root with os.scandir, in sorted order.
+
+    Names are matched as strings, so a Path is only built for actual documents.
+    """
+    result: list[Path] = []
+    stack = [str(docs_root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif _should_include_doc(entry.name) and entry.is_file():
+                        result.append(Path(entry.path))
+        except OSError:
+            continue
+    result.sort()
+    return result
+
+
+def _document_hash(path: Path, chunk_size: int, chunk_overlap: int, fast: bool) -> bytes | None:
+    """Hash a document's bytes with the settings that shaped its chunks. None if unreadable.
+
+    CHUNKER_VERSION is part of the seed, so a chunker change re-chunks every document.
+    """
+    h = hashlib.blake2b(f"{CHUNKER_VERSION}:{chunk_size}:{chunk_overlap}:{int(fast)}:".encode(), digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    except OSError:
+        return None
+    return h.digest()
+
+
+# Workers are spawned, not forked: the parent may already run ONNX embedder threads (e.g.
+# when the pool is restarted mid-run), and forking a multi-threaded process can deadlock.
+_POOL_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _iter_converted(files: list[Path], workers: int, fast: bool = False) -> Iterator[tuple[Path, Future]]:
+    """Yield (file_path, future of its markdown) in input order.
+
+    With workers > 1, conversions run ahead in a process pool, at most two per worker in
+    flight. If a worker dies, the pool is replaced and only the conversions in flight are lost.
+    Otherwise each file is converted in-process when reached. Conversion errors surface from
+    future.result().
+    """
+    if workers <= 1:
+        for path in files:
+            future: Future = Future()
+            try:
+                future.set_result(_convert_document(path, fast))
+            except Exception as e:
+                future.set_exception(e)
+            yield path, future
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT)
+    try:
+        in_flight: deque = deque()
+        for path in files:
+            try:
+                future = pool.submit(_convert_document, path, fast)
+            except BrokenProcessPool:
+                # A worker died (e.g. Docling crashed on a document). The conversions that were
+                # in flight fail with BrokenProcessPool and are skipped; the rest use a new pool.
+                logger.warning("Document conversion worker died, restarting the process pool")
+                pool.shutdown()
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT)
+                future = pool.submit(_convert_document, path, fast)
+            in_flight.append((path, future))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft()
+        while in_flight:
+            yield in_flight.popleft()
+    finally:
+        pool.shutdown()
 
 
 def index_documents(
@@ -35,14 +167,22 @@ def index_documents(
     db_path: str,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
-    batch_size: int = 32,
+    batch_size: int = DEFAULT_INDEX_BATCH_SIZE,
+    workers: int = 1,
+    fast: bool = False,
 ) -> dict:
     """Index a documents directory into SQLite with vector embeddings.
 
     Converts each document to markdown via Docling, then chunks and embeds.
-    Uses the same code_chunks table with language='document'.
+    Uses the same code_chunks table with language='document'. With workers > 1, documents
+    are converted in that many processes; chunking, embedding and writes stay on this thread.
+    fast=True skips OCR and uses fast table recognition for PDFs.
 
-    Returns stats dict with files_processed, files_skipped, chunks_indexed, chunks_deleted.
+    Documents whose bytes hash to the value stored at their last index are not converted
+    again. Chunks whose text is already stored at the same location are not re-embedded.
+
+    Returns stats dict with files_processed, files_skipped, files_unchanged, chunks_indexed,
+    chunks_unchanged, chunks_deleted.
     """
     docs_root = Path(docs_path).resolve()
     if not docs_root.is_dir():
@@ -51,17 +191,36 @@ def index_documents(
     conn = connect(Path(db_path))
     init_codebase_schema(conn)
 
-    stats = {"files_processed": 0, "files_skipped": 0, "chunks_indexed": 0, "chunks_deleted": 0}
+    stats = {
+        "files_processed": 0,
+        "files_skipped": 0,
+        "files_unchanged": 0,
+        "chunks_indexed": 0,
+        "chunks_unchanged": 0,
+        "chunks_deleted": 0,
+    }
 
-    files = sorted(p for p in docs_root.rglob("*") if p.is_file() and _should_include_doc(p))
+    # Hash up front so unchanged documents never reach Docling, which dwarfs reading the file.
+    stored_hashes = get_file_hashes(conn)
+    files: list[Path] = []
+    digests: dict[Path, bytes | None] = {}
+    for file_path in _walk_doc_files(docs_root):
+        digest = _document_hash(file_path, chunk_size, chunk_overlap, fast)
+        if digest is not None and digest == stored_hashes.get(_relative_name(file_path, docs_root)):
+            stats["files_unchanged"] += 1
+            continue
+        files.append(file_path)
+        digests[file_path] = digest
 
     pending: list[tuple[str, str, str, str]] = []  # (filename, location, lang, text)
     pending_texts: list[str] = []
+    # As in index_codebase, a hash is stored only once the document's chunks are flushed.
+    pending_hashes: list[tuple[str, bytes]] = []
 
-    for file_path in files:
-        rel = str(file_path.relative_to(docs_root)).replace("\\", "/")
+    for file_path, converted in _iter_converted(files, workers, fast):
+        rel = _relative_name(file_path, docs_root)
         try:
-            content = _convert_document(file_path)
+            content = converted.result()
         except Exception:
             logger.warning("Failed to convert %s, skipping", rel, exc_info=True)
             stats["files_skipped"] += 1
@@ -72,22 +231,31 @@ def index_documents(
             continue
 
         chunks = split_simple(content, chunk_size, chunk_overlap)
+        existing = get_file_chunks(conn, rel)
         keep = {c["location"] for c in chunks}
-        stats["chunks_deleted"] += delete_stale_chunks(conn, rel, keep)
+        stale = [row_id for location, (row_id, _) in existing.items() if location not in keep]
+        stats["chunks_deleted"] += delete_chunks_by_id(conn, stale)
         stats["files_processed"] += 1
 
         for c in chunks:
+            stored = existing.get(c["location"])
+            if stored is not None and stored[1] == c["text"]:
+                stats["chunks_unchanged"] += 1
+                continue
             pending.append((rel, c["location"], "document", c["text"]))
             pending_texts.append(c["text"])
+        if digests[file_path] is not None:
+            pending_hashes.append((rel, digests[file_path]))
 
         if len(pending_texts) >= batch_size:
-            _flush(conn, pending, pending_texts)
+            _flush(conn, pending, pending_texts, pending_hashes)
             stats["chunks_indexed"] += len(pending_texts)
             pending.clear()
             pending_texts.clear()
+            pending_hashes.clear()
 
-    if pending_texts:
-        _flush(conn, pending, pending_texts)
+    if pending_texts or pending_hashes:
+        _flush(conn, pending, pending_texts, pending_hashes)
         stats["chunks_indexed"] += len(pending_texts)
 
     conn.commit()
@@ -95,7 +263,11 @@ def index_documents(
     return stats
 
 
-def _flush(conn, chunks, texts):
-    embeddings = embed_texts(texts)
-    for (fn, loc, lang, code), emb in zip(chunks, embeddings, strict=True):
-        upsert_code_chunk(conn, fn, loc, lang, code, emb)
+def _relative_name(file_path: Path, docs_root: Path) -> str:
+    return str(file_path.relative_to(docs_root)).replace("\\", "/")
+
+
+def _flush(conn, chunks, texts, hashes):
+    if texts:
+        upsert_code_chunks(conn, chunks, embed_texts(texts))
+    set_file_hashes(conn, hashes)
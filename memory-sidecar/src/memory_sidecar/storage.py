@@ -4,16 +4,24 @@ from __future__ import annotations
 
 import json
 import sqlite3
-import struct
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 from memory_sidecar.config import EMBED_DIMENSIONS
 
+# Set once loading sqlite-vec has failed (not installed, or a sqlite3 build without extension
+# loading), so later connections skip the import and load attempt.
+_vec_unavailable = False
+
 
 def _ensure_vec(conn: sqlite3.Connection) -> bool:
     """Try to load sqlite-vec extension into *conn*. Returns True if available."""
+    global _vec_unavailable
+    if _vec_unavailable:
+        return False
     try:
         import sqlite_vec
 
@@ -22,6 +30,7 @@ def _ensure_vec(conn: sqlite3.Connection) -> bool:
         conn.enable_load_extension(False)
         return True
     except Exception:
+        _vec_unavailable = True
         return False
 
 
@@ -38,8 +47,16 @@ def connect(db_path: Path) -> sqlite3.Connection:
     """Open a SQLite connection with sqlite-vec loaded if available."""
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(str(db_path))
+    if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+        # Page size is fixed once the first table exists (and cannot change under WAL);
+        # larger pages mean fewer overflow pages for code text and vec0 vector blobs.
+        conn.execute("PRAGMA page_size=8192")
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # vec0 search scans every stored vector; keep them in cache / mapped instead of re-reading.
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB
     _ensure_vec(conn)
     return conn
 
@@ -58,16 +75,66 @@ def init_codebase_schema(conn: sqlite3.Connection) -> None:
         )
     """)
     if _conn_has_vec(conn):
-        conn.execute(f"""
-            CREATE VIRTUAL TABLE IF NOT EXISTS code_chunks_vec USING vec0(
-                id INTEGER PRIMARY KEY,
-                embedding FLOAT[{EMBED_DIMENSIONS}]
-            )
-        """)
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_code_chunks_filename ON code_chunks(filename)")
+        # Dropping a FLOAT[] table and re-inserting its vectors is one transaction: file_hashes
+        # would otherwise keep marking those files unchanged after their vectors were lost.
+        conn.commit()
+        conn.execute("BEGIN")
+        try:
+            legacy = _take_float_vecs(conn, "code_chunks_vec")
+            # Vectors are stored L2-normalized and quantized to int8 (see _quantize_vecs).
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS code_chunks_vec USING vec0(
+                    id INTEGER PRIMARY KEY,
+                    embedding INT8[{EMBED_DIMENSIONS}] distance_metric=cosine
+                )
+            """)
+            if legacy:
+                ids = [row_id for row_id, _ in legacy]
+                _replace_code_vecs(conn, ids, np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in legacy]))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    # UNIQUE(filename, location) already indexes filename lookups; a separate filename index
+    # only added a second B-tree to maintain on every chunk write.
+    conn.execute("DROP INDEX IF EXISTS idx_code_chunks_filename")
+    # Content hash per indexed file, so unchanged files can skip chunking entirely
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS file_hashes (
+            filename TEXT PRIMARY KEY,
+            content_hash BLOB NOT NULL
+        )
+    """)
     conn.commit()
 
 
+def _take_float_vecs(conn: sqlite3.Connection, table: str) -> list[tuple[int, bytes]]:
+    """If *table* is a vec0 table with a FLOAT[] column, drop it and return its (id, vector) rows.
+
+    Lets schema init recreate the table with quantized vectors without re-embedding.
+    """
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name = ?", (table,)).fetchone()
+    if row is None or "FLOAT[" not in row[0].upper():
+        return []
+    rows = conn.execute(f"SELECT id, embedding FROM {table}").fetchall()  # noqa: S608
+    conn.execute(f"DROP TABLE {table}")
+    return rows
+
+
+def _take_knowledge_vecs(conn: sqlite3.Connection) -> list[tuple[int, bytes]]:
+    """Drop a knowledge_vec table that predates the category column; return its (id, int8 vector) rows."""
+    legacy = _take_float_vecs(conn, "knowledge_vec")
+    if legacy:
+        vecs = _quantize_vecs(np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in legacy]))
+        return [(row_id, vec.tobytes()) for (row_id, _), vec in zip(legacy, vecs, strict=True)]
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name = 'knowledge_vec'").fetchone()
+    if row is None or "category" in row[0]:
+        return []
+    rows = conn.execute("SELECT id, embedding FROM knowledge_vec").fetchall()
+    conn.execute("DROP TABLE knowledge_vec")
+    return rows
+
+
 def init_knowledge_schema(conn: sqlite3.Connection) -> None:
     """Create the knowledge entries table with virtual vec0 table for vectors and FTS5 for full-text."""
     conn.execute("""
@@ -81,12 +148,29 @@ def init_knowledge_schema(conn: sqlite3.Connection) -> None:
         )
     """)
     if _conn_has_vec(conn):
-        conn.execute(f"""
-            CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_vec USING vec0(
-                id INTEGER PRIMARY KEY,
-                embedding FLOAT[{EMBED_DIMENSIONS}]
-            )
-        """)
+        # Rebuilding an older knowledge_vec is one transaction so a failure keeps the old vectors.
+        conn.commit()
+        conn.execute("BEGIN")
+        try:
+            carried = _take_knowledge_vecs(conn)
+            # category is a vec0 metadata column so filtered KNN queries apply it inside the scan.
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_vec USING vec0(
+                    id INTEGER PRIMARY KEY,
+                    embedding INT8[{EMBED_DIMENSIONS}] distance_metric=cosine,
+                    category TEXT
+                )
+            """)
+            if carried:
+                conn.executemany(
+                    """INSERT INTO knowledge_vec (id, embedding, category)
+                       SELECT id, vec_int8(?), category FROM knowledge WHERE id = ?""",
+                    [(blob, row_id) for row_id, blob in carried],
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
     # Check if FTS table already exists before creating it
     fts_exists = (
         conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='knowledge_fts'").fetchone() is not None
@@ -148,17 +232,58 @@ def set_metadata(conn: sqlite3.Connection, key: str, value: str) -> None:
 
 
 def purge_all_code_chunks(conn: sqlite3.Connection) -> int:
-    """Delete all code chunks and their vec0 embeddings. Returns count deleted."""
+    """Delete all code chunks, their vec0 embeddings and file hashes. Returns count deleted."""
     count = conn.execute("SELECT COUNT(*) FROM code_chunks").fetchone()[0]
     if _conn_has_vec(conn):
         conn.execute("DELETE FROM code_chunks_vec")
     conn.execute("DELETE FROM code_chunks")
+    conn.execute("DELETE FROM file_hashes")
     return count
 
 
-def _serialize_vec(vec: list[float]) -> bytes:
-    """Serialize a float vector to bytes for sqlite-vec."""
-    return struct.pack(f"{len(vec)}f", *vec)
+def get_file_hashes(conn: sqlite3.Connection) -> dict[str, bytes]:
+    """Return {filename: content_hash} for every indexed file."""
+    return dict(conn.execute("SELECT filename, content_hash FROM file_hashes"))
+
+
+def set_file_hashes(conn: sqlite3.Connection, hashes: list[tuple[str, bytes]]) -> None:
+    """Record content hashes for files whose chunks are fully stored (upsert)."""
+    with conn:
+        conn.executemany(
+            "INSERT INTO file_hashes (filename, content_hash) VALUES (?, ?) "
+            "ON CONFLICT(filename) DO UPDATE SET content_hash=excluded.content_hash",
+            hashes,
+        )
+
+
+def _quantize_vecs(vecs: list[list[float]] | np.ndarray) -> np.ndarray:
+    """L2-normalize each row and scale it to int8 for an INT8[] vec0 column.
+
+    int8 vectors take a quarter of the space of FLOAT[] and scan faster; since rows are
+    normalized first, cosine distance over them closely tracks the float ranking.
+    """
+    arr = np.atleast_2d(np.asarray(vecs, dtype=np.float32))
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    arr = arr / np.where(norms == 0, 1, norms)
+    return np.clip(np.rint(arr * 127), -127, 127).astype(np.int8)
+
+
+_UPSERT_CODE_CHUNK_SQL = """INSERT INTO code_chunks (filename, location, language, code, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(filename, location) DO UPDATE SET
+        language=excluded.language, code=excluded.code, updated_at=excluded.updated_at"""
+
+
+def _replace_code_vecs(conn: sqlite3.Connection, ids: list[int], embeddings: list[list[float]] | np.ndarray) -> None:
+    """Write embeddings for the given code chunk ids, replacing any existing vectors."""
+    # vec0 ignores OR REPLACE and raises on a duplicate primary key, so delete first.
+    conn.executemany("DELETE FROM code_chunks_vec WHERE id = ?", [(row_id,) for row_id in ids])
+    if not ids:
+        return
+    conn.executemany(
+        "INSERT INTO code_chunks_vec (id, embedding) VALUES (?, vec_int8(?))",
+        [(row_id, vec.tobytes()) for row_id, vec in zip(ids, _quantize_vecs(embeddings), strict=True)],
+    )
 
 
 def upsert_code_chunk(
@@ -167,29 +292,47 @@ def upsert_code_chunk(
     location: str,
     language: str | None,
     code: str,
-    embedding: list[float],
+    embedding: list[float] | np.ndarray,
 ) -> None:
     """Insert or update a code chunk and its embedding vector."""
     now = datetime.now(UTC).isoformat()
-    cur = conn.execute(
-        """INSERT INTO code_chunks (filename, location, language, code, updated_at)
-           VALUES (?, ?, ?, ?, ?)
-           ON CONFLICT(filename, location) DO UPDATE SET
-               language=excluded.language, code=excluded.code, updated_at=excluded.updated_at
-           RETURNING id""",
-        (filename, location, language, code, now),
-    )
+    cur = conn.execute(f"{_UPSERT_CODE_CHUNK_SQL} RETURNING id", (filename, location, language, code, now))
     row_id = cur.fetchone()[0]
     if _conn_has_vec(conn):
-        conn.execute(
-            "INSERT OR REPLACE INTO code_chunks_vec (id, embedding) VALUES (?, ?)",
-            (row_id, _serialize_vec(embedding)),
-        )
+        _replace_code_vecs(conn, [row_id], [embedding])
+
+
+def upsert_code_chunks(
+    conn: sqlite3.Connection,
+    rows: list[tuple[str, str, str | None, str]],
+    embeddings: list[list[float]] | np.ndarray,
+) -> None:
+    """Insert or update a batch of (filename, location, language, code) chunks and their embeddings.
+
+    Runs as a single transaction with one executemany per table instead of per-row statements.
+    """
+    now = datetime.now(UTC).isoformat()
+    with conn:
+        conn.executemany(_UPSERT_CODE_CHUNK_SQL, [(*row, now) for row in rows])
+        if _conn_has_vec(conn):
+            # executemany cannot return rows, so map the batch back to ids in one indexed lookup.
+            keys = json.dumps([[filename, location] for filename, location, _, _ in rows])
+            ids = [
+                r[0]
+                for r in conn.execute(
+                    """SELECT c.id FROM json_each(?) AS j
+                       JOIN code_chunks c
+                         ON c.filename = json_extract(j.value, '$[0]') AND c.location = json_extract(j.value, '$[1]')
+                       ORDER BY j.key""",
+                    (keys,),
+                )
+            ]
+            _replace_code_vecs(conn, ids, embeddings)
 
 
 def search_code(
     conn: sqlite3.Connection,
-    query_embedding: list[float],
+    query_embedding: list[float] | np.ndarray,
     top_k: int = 10,
 ) -> list[dict[str, Any]]:
     """Search code chunks by vector similarity."""
@@ -199,9 +342,9 @@ def search_code(
         """SELECT v.id, v.distance, c.filename, c.location, c.language, c.code
            FROM code_chunks_vec v
            JOIN code_chunks c ON c.id = v.id
-           WHERE v.embedding MATCH ? AND k = ?
+           WHERE v.embedding MATCH vec_int8(?) AND k = ?
            ORDER BY v.distance""",
-        (_serialize_vec(query_embedding), top_k),
+        (_quantize_vecs(query_embedding)[0].tobytes(), top_k),
     ).fetchall()
     return [{"filename": r[2], "location": r[3], "language": r[4], "code": r[5], "score": 1.0 - r[1]} for r in rows]
 
@@ -211,7 +354,7 @@ def insert_knowledge(
     content: str,
     category: str,
     tags: dict[str, str] | None,
-    embedding: list[float],
+    embedding: list[float] | np.ndarray,
 ) -> int:
     """Insert a knowledge entry and its embedding. Returns the row id."""
     now = datetime.now(UTC).isoformat()
@@ -224,36 +367,43 @@ def insert_knowledge(
     row_id = cur.lastrowid
     if _conn_has_vec(conn):
         conn.execute(
-            "INSERT INTO knowledge_vec (id, embedding) VALUES (?, ?)",
-            (row_id, _serialize_vec(embedding)),
+            "INSERT INTO knowledge_vec (id, embedding, category) VALUES (?, vec_int8(?), ?)",
+            (row_id, _quantize_vecs(embedding)[0].tobytes(), category),
         )
     return row_id
 
 
 def search_knowledge(
     conn: sqlite3.Connection,
-    query_embedding: list[float],
+    query_embedding: list[float] | np.ndarray,
     category: str | None = None,
     top_k: int = 10,
 ) -> list[dict[str, Any]]:
     """Search knowledge entries by vector similarity, optionally filtered by category."""
     if not _conn_has_vec(conn):
         return []
-    # sqlite-vec does not support arbitrary WHERE predicates alongside MATCH + k = ?,
-    # so we over-fetch and post-filter by category in Python.
-    effective_top_k = top_k * 3 if category else top_k
-    rows = conn.execute(
-        """SELECT v.id, v.distance, kn.content, kn.category, kn.tags, kn.stored_at
-           FROM knowledge_vec v
-           JOIN knowledge kn ON kn.id = v.id
-           WHERE v.embedding MATCH ? AND k = ?
-           ORDER BY v.distance""",
-        (_serialize_vec(query_embedding), effective_top_k),
-    ).fetchall()
+    query = _quantize_vecs(query_embedding)[0].tobytes()
     if category:
-        rows = [r for r in rows if r[3] == category][:top_k]
+        rows = conn.execute(
+            """SELECT v.id, v.distance, kn.content, kn.category, kn.tags, kn.stored_at
+               FROM knowledge_vec v
+               JOIN knowledge kn ON kn.id = v.id
+               WHERE v.embedding MATCH vec_int8(?) AND k = ? AND v.category = ?
+               ORDER BY v.distance""",
+            (query, top_k, category),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            """SELECT v.id, v.distance, kn.content, kn.category, kn.tags, kn.stored_at
+               FROM knowledge_vec v
+               JOIN knowledge kn ON kn.id = v.id
+               WHERE v.embedding MATCH vec_int8(?) AND k = ?
+               ORDER BY v.distance""",
+            (query, top_k),
+        ).fetchall()
     return [
         {
+            "id": r[0],
             "content": r[2],
             "category": r[3],
             "tags": json.loads(r[4]) if r[4] else None,
@@ -264,36 +414,40 @@ def search_knowledge(
     ]
 
 
+def _fts_query(query_text: str, phrase: bool = False) -> str:
+    """Build an FTS5 MATCH expression from user text.
+
+    Each whitespace-separated token is quoted as its own string, so all must appear in any
+    order (implicit AND); with phrase=True the whole text is one exact phrase. Quoting keeps
+    FTS5 operators and punctuation in the input from being parsed as query syntax.
+    """
+    terms = [query_text] if phrase else query_text.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms) or '""'
+
+
 def search_knowledge_fts(
     conn: sqlite3.Connection,
     query_text: str,
     category: str | None = None,
     top_k: int = 10,
+    phrase: bool = False,
 ) -> list[dict[str, Any]]:
-    """Search knowledge entries using FTS5 full-text search."""
-    # Escape double-quotes in query to prevent FTS5 syntax errors
-    escaped = query_text.replace('"', '""')
-    fts_query = f'"{escaped}"'
-    if category:
-        rows = conn.execute(
-            """SELECT kn.id, rank, kn.content, kn.category, kn.tags, kn.stored_at
-               FROM knowledge_fts fts
-               JOIN knowledge kn ON kn.id = fts.rowid
-               WHERE knowledge_fts MATCH ? AND kn.category = ?
-               ORDER BY rank
-               LIMIT ?""",
-            (fts_query, category, top_k),
-        ).fetchall()
-    else:
-        rows = conn.execute(
-            """SELECT kn.id, rank, kn.content, kn.category, kn.tags, kn.stored_at
-               FROM knowledge_fts fts
-               JOIN knowledge kn ON kn.id = fts.rowid
-               WHERE knowledge_fts MATCH ?
-               ORDER BY rank
-               LIMIT ?""",
-            (fts_query, top_k),
-        ).fetchall()
+    """Search knowledge entries using FTS5 full-text search.
+
+    Matches entries containing every query token; phrase=True requires the exact phrase.
+    """
+    fts_query = _fts_query(query_text, phrase)
+    # One statement for both cases (category may be None); the FTS match still drives the plan.
+    category = category or None
+    rows = conn.execute(
+        """SELECT kn.id, rank, kn.content, kn.category, kn.tags, kn.stored_at
+           FROM knowledge_fts fts
+           JOIN knowledge kn ON kn.id = fts.rowid
+           WHERE knowledge_fts MATCH ? AND (? IS NULL OR kn.category = ?)
+           ORDER BY rank
+           LIMIT ?""",
+        (fts_query, category, category, top_k),
+    ).fetchall()
     return [
         {
             "id": r[0],
@@ -307,57 +461,83 @@ def search_knowledge_fts(
     ]
 
 
+# Reciprocal rank fusion in one statement: both ranked lists come from CTEs and only the
+# fused top_k rows are joined back to knowledge. Ties keep vector hits first, in rank order.
+_HYBRID_SQL = """
+    WITH v AS (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rn
+        FROM knowledge_vec
+        WHERE embedding MATCH vec_int8(?) AND k = ? {vec_filter}
+    ), f AS (
+        SELECT fts.rowid AS id, ROW_NUMBER() OVER (ORDER BY rank) AS rn
+        FROM knowledge_fts fts
+        JOIN knowledge kn ON kn.id = fts.rowid
+        WHERE knowledge_fts MATCH ? AND (? IS NULL OR kn.category = ?)
+        ORDER BY rank
+        LIMIT ?
+    ), fused AS (
+        SELECT id, SUM(1.0 / (? + rn)) AS score, MIN(src * 1000000 + rn) AS src_rn
+        FROM (SELECT id, rn, 0 AS src FROM v UNION ALL SELECT id, rn, 1 FROM f)
+        GROUP BY id
+    )
+    SELECT kn.id, fused.score, kn.content, kn.category, kn.tags, kn.stored_at
+    FROM fused
+    JOIN knowledge kn ON kn.id = fused.id
+    ORDER BY fused.score DESC, fused.src_rn
+    LIMIT ?
+"""
+
+
 def search_knowledge_hybrid(
     conn: sqlite3.Connection,
-    query_embedding: list[float],
+    query_embedding: list[float] | np.ndarray,
     query_text: str,
     category: str | None = None,
     top_k: int = 10,
     rrf_k: int = 60,
+    phrase: bool = False,
 ) -> list[dict[str, Any]]:
     """Hybrid search combining vector similarity and FTS5 with reciprocal rank fusion.
 
     Uses RRF formula: score(d) = sum(1 / (k + rank_i)) across both result lists.
     The rrf_k constant (default 60) controls how much lower-ranked results contribute.
+    phrase is passed through to the FTS side (see search_knowledge_fts).
     """
-    vec_results = search_knowledge(conn, query_embedding, category, top_k * 2)
-    fts_results = search_knowledge_fts(conn, query_text, category, top_k * 2)
-
-    # Build RRF scores keyed by (content, category) as a stable identifier
-    scores: dict[str, float] = {}
-    entries: dict[str, dict[str, Any]] = {}
+    if not _conn_has_vec(conn):
+        fts_results = search_knowledge_fts(conn, query_text, category, top_k * 2, phrase)[:top_k]
+        return [{**entry, "relevance": 1.0 / (rrf_k + rank + 1)} for rank, entry in enumerate(fts_results)]
 
-    for rank, entry in enumerate(vec_results):
-        key = f"{entry['stored_at']}:{entry['content'][:80]}"
-        scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
-        entries[key] = entry
+    category = category or None
+    vec_params = (_quantize_vecs(query_embedding)[0].tobytes(), top_k * 2, *((category,) if category else ()))
+    rows = conn.execute(
+        _HYBRID_SQL.format(vec_filter="AND category = ?" if category else ""),
+        (*vec_params, _fts_query(query_text, phrase), category, category, top_k * 2, rrf_k, top_k),
+    ).fetchall()
+    return [
+        {
+            "id": r[0],
+            "content": r[2],
+            "category": r[3],
+            "tags": json.loads(r[4]) if r[4] else None,
+            "stored_at": r[5],
+            "relevance": r[1],
+        }
+        for r in rows
+    ]
 
-    for rank, entry in enumerate(fts_results):
-        key = f"{entry['stored_at']}:{entry['content'][:80]}"
-        scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
-        if key not in entries:
-            entries[key] = entry
 
-    # Sort by RRF score descending, take top_k
-    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
-    return [{**entries[key], "relevance": score} for key, score in ranked]
+def get_file_chunks(conn: sqlite3.Connection, filename: str) -> dict[str, tuple[int, str]]:
+    """Return the stored chunks of a file as {location: (id, code)}."""
+    rows = conn.execute("SELECT location, id, code FROM code_chunks WHERE filename = ?", (filename,))
+    return {location: (row_id, code) for location, row_id, code in rows}
 
 
-def delete_stale_chunks(conn: sqlite3.Connection, filename: str, keep_locations: set[str]) -> int:
-    """Remove chunks for a file that are no longer present. Returns count deleted."""
-    if not keep_locations:
-        cur = conn.execute("SELECT id FROM code_chunks WHERE filename = ?", (filename,))
-    else:
-        placeholders = ",".join("?" for _ in keep_locations)
-        cur = conn.execute(
-            f"SELECT id FROM code_chunks WHERE filename = ? AND location NOT IN ({placeholders})",  # noqa: S608
-            (filename, *keep_locations),
-        )
-    ids = [r[0] for r in cur.fetchall()]
+def delete_chunks_by_id(conn: sqlite3.Connection, ids: list[int]) -> int:
+    """Remove chunks and their vec0 embeddings by primary key. Returns count deleted."""
     if not ids:
         return 0
-    id_ph = ",".join("?" for _ in ids)
+    params = [(i,) for i in ids]
     if _conn_has_vec(conn):
-        conn.execute(f"DELETE FROM code_chunks_vec WHERE id IN ({id_ph})", ids)  # noqa: S608
-    conn.execute(f"DELETE FROM code_chunks WHERE id IN ({id_ph})", ids)  # noqa: S608
+        conn.executemany("DELETE FROM code_chunks_vec WHERE id = ?", params)
+    conn.executemany("DELETE FROM code_chunks WHERE id = ?", params)
     return len(ids)
@@ -2,9 +2,19 @@
 
 from __future__ import annotations
 
+import threading
+
 import pytest
 
-from memory_sidecar.chunking import _validate_chunk_params, chunk_file, split_ast, split_simple
+from memory_sidecar.chunking import (
+    _collect_top_level_nodes,
+    _get_parser,
+    _parse_spans,
+    _validate_chunk_params,
+    chunk_file,
+    split_ast,
+    split_simple,
+)
 
 
 class TestValidateChunkParams:
@@ -97,6 +107,13 @@ class TestSplitSimple:
 
         assert len(chunks_with_overlap) >= len(chunks_no_overlap)
 
+    def test_long_lines_advance_past_overlap(self):
+        # Newlines closer to the window start than the overlap must not stall the window
+        content = ("z" * 3000 + "\n") * 10
+        chunks = split_simple(content, chunk_size=1000, chunk_overlap=300)
+
+        assert len(chunks) <= 2 * (len(content) // (1000 - 300) + 1)
+
     def test_location_format(self):
         content = "x" * 500
         chunks = split_simple(content, chunk_size=200, chunk_overlap=50)
@@ -141,6 +158,19 @@ class TestSplitAst:
         assert "def foo" in result[0]["text"]
         assert "def bar" in result[1]["text"]
 
+    def test_size_counts_characters_not_bytes(self):
+        # Each function is 25 characters but 35 UTF-8 bytes, so both fit in 60 characters only.
+        code = 'def f():\n    "éééééééééé"\n\ndef g():\n    "éééééééééé"\n'
+        result = split_ast(code, "python", chunk_size=60, chunk_overlap=0)
+        assert result is not None
+        assert len(result) == 1
+
+    def test_chunk_text_is_verbatim_source_slice(self):
+        code = "import os\n\n\ndef foo():\n    pass\n"
+        result = split_ast(code, "python", chunk_size=1000, chunk_overlap=0)
+        assert result is not None
+        assert result[0]["text"] == code.rstrip("\n")
+
     def test_python_class_kept_intact(self):
         code = "class MyClass:\n    def method(self):\n        pass\n"
         result = split_ast(code, "python", chunk_size=1000, chunk_overlap=0)
@@ -207,6 +237,77 @@ class TestSplitAst:
             assert isinstance(result, list)
 
 
+class TestCollectTopLevelNodes:
+    """Tests for top-level semantic node selection."""
+
+    @pytest.mark.parametrize(
+        ("language", "code", "expected"),
+        [
+            (
+                "python",
+                '"""Doc."""\n# note\nimport os\nX = 1\n\n@dec\ndef f():\n    pass\n\nclass C:\n    pass\n',
+                [
+                    "expression_statement",
+                    "comment",
+                    "import_statement",
+                    "expression_statement",
+                    "decorated_definition",
+                    "class_definition",
+                ],
+            ),
+            (
+                "rust",
+                "// note\nuse std::io;\nconst X: i32 = 1;\nfn f() {}\nstruct S;\n",
+                ["line_comment", "use_declaration", "const_item", "function_item", "struct_item"],
+            ),
+            (
+                "typescript",
+                "// note\nimport x from 'x';\nlet a = 1;\nfunction f() {}\ninterface I {}\n",
+                ["comment", "import_statement", "lexical_declaration", "function_declaration", "interface_declaration"],
+            ),
+        ],
+    )
+    def test_keeps_definitions_comments_and_other_named_nodes(self, language, code, expected):
+        tree = _get_parser(language).parse(code.encode("utf-8"))
+
+        nodes = _collect_top_level_nodes(tree.root_node, language)
+
+        assert [n.type for n in nodes] == expected
+
+
+class TestGetParser:
+    """Tests for the per-thread parser cache."""
+
+    def test_reuses_parser_within_thread(self):
+        assert _get_parser("python") is _get_parser("python")
+
+    def test_separate_parser_per_thread(self):
+        main_parser = _get_parser("python")
+        other: list = []
+        thread = threading.Thread(target=lambda: other.append(_get_parser("python")))
+        thread.start()
+        thread.join()
+        assert other[0] is not None
+        assert other[0] is not main_parser
+
+    def test_unsupported_language_returns_none(self):
+        assert _get_parser("brainfuck") is None
+        assert _get_parser("brainfuck") is None
+
+
+class TestParseSpans:
+    """Tests for top-level span extraction."""
+
+    def test_spans_cover_top_level_nodes(self):
+        source = b"import os\n\ndef foo():\n    pass\n"
+        spans = _parse_spans("python", source)
+        assert spans is not None
+        assert [source[s:e] for s, e in spans] == [b"import os", b"def foo():\n    pass"]
+
+    def test_unsupported_language_returns_none(self):
+        assert _parse_spans("brainfuck", b"+++") is None
+
+
 class TestChunkFile:
     """Tests for the chunk_file dispatch function."""
 
@@ -216,6 +317,11 @@ class TestChunkFile:
         assert len(result) >= 1
         assert "def hello" in result[0]["text"]
 
+    def test_source_bytes_match_encoded_content(self):
+        code = "def héllo():\n    return 'ü'\n\n\ndef bye():\n    pass\n"
+        expected = chunk_file(code, "python", chunk_size=30, chunk_overlap=0)
+        assert chunk_file(code, "python", chunk_size=30, chunk_overlap=0, source=code.encode("utf-8")) == expected
+
     def test_falls_back_for_none_language(self):
         text = "just some plain text content"
         result = chunk_file(text, None, chunk_size=1000, chunk_overlap=0)
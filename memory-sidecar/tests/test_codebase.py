@@ -2,68 +2,41 @@
 
 from __future__ import annotations
 
-from pathlib import Path
-
-from memory_sidecar.flows.codebase import _should_include, _walk_source_files
-
-
-class TestShouldInclude:
-    """Tests for the _should_include file filter."""
-
-    def _path(self, rel: str, root: str = "/project") -> tuple[Path, Path]:
-        return Path(root) / rel, Path(root)
-
-    def test_includes_python_file(self):
-        path, root = self._path("src/main.py")
-        assert _should_include(path, root) is True
-
-    def test_includes_cs_file(self):
-        path, root = self._path("contracts/Core.cs")
-        assert _should_include(path, root) is True
-
-    def test_excludes_non_code_extension(self):
-        path, root = self._path("image.png")
-        assert _should_include(path, root) is False
-
-    def test_excludes_hidden_directory(self):
-        path, root = self._path(".git/config")
-        assert _should_include(path, root) is False
-
-    def test_excludes_dotfile(self):
-        path, root = self._path(".hidden/script.py")
-        assert _should_include(path, root) is False
-
-    def test_excludes_node_modules(self):
-        path, root = self._path("node_modules/package/index.js")
-        assert _should_include(path, root) is False
-
-    def test_excludes_pycache(self):
-        path, root = self._path("src/__pycache__/module.py")
-        assert _should_include(path, root) is False
-
-    def test_excludes_bin_directory(self):
-        path, root = self._path("bin/Debug/net8.0/App.dll")
-        assert _should_include(path, root) is False
-
-    def test_excludes_obj_directory(self):
-        path, root = self._path("obj/project.assets.json")
-        assert _should_include(path, root) is False
-
-    def test_case_insensitive_extension(self):
-        path, root = self._path("Main.CS")
-        assert _should_include(path, root) is True
-
-    def test_deeply_nested_valid_file(self):
-        path, root = self._path("src/core/utils/helpers.ts")
-        assert _should_include(path, root) is True
-
-    def test_excludes_artifacts_directory(self):
-        path, root = self._path("build/_artifacts/nuget/pkg.json")
-        assert _should_include(path, root) is False
-
-    def test_excludes_addons_directory(self):
-        path, root = self._path("addons/plugin/script.py")
-        assert _should_include(path, root) is False
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from memory_sidecar.flows.codebase import _iter_chunked_files, _walk_source_files, index_codebase
+
+
+class TestFileFilter:
+    """Tests for which files _walk_source_files selects, one file per tree."""
+
+    @pytest.mark.parametrize(
+        ("rel", "included"),
+        [
+            ("src/main.py", True),
+            ("contracts/Core.cs", True),
+            ("image.png", False),
+            (".git/config", False),
+            (".hidden/script.py", False),
+            ("node_modules/package/index.js", False),
+            ("src/__pycache__/module.py", False),
+            ("bin/Debug/net8.0/App.dll", False),
+            ("obj/project.assets.json", False),
+            ("Main.CS", True),
+            ("src/core/utils/helpers.ts", True),
+            ("build/_artifacts/nuget/pkg.json", False),
+            ("addons/plugin/script.py", False),
+        ],
+    )
+    def test_selection(self, tmp_path, rel, included):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+
+        assert _walk_source_files(tmp_path) == ([path] if included else [])
 
 
 class TestWalkSourceFiles:
@@ -123,6 +96,21 @@ class TestWalkSourceFiles:
         names = [f.name for f in files]
         assert names == ["a.py", "b.py", "c.py"]
 
+    def test_files_before_subdirectories(self, tmp_path):
+        for rel in ["b/z.py", "a/y.py", "x.py", "a/c/w.py"]:
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("x = 1")
+
+        files = _walk_source_files(tmp_path)
+        rels = [f.relative_to(tmp_path).as_posix() for f in files]
+        assert rels == ["x.py", "a/y.py", "a/c/w.py", "b/z.py"]
+
+    def test_case_insensitive_extension(self, tmp_path):
+        (tmp_path / "Main.CS").write_text("class Main {}")
+
+        files = _walk_source_files(tmp_path)
+        assert [f.name for f in files] == ["Main.CS"]
+
     def test_excludes_hidden_files(self, tmp_path):
         (tmp_path / ".secret.py").write_text("secret = 'key'")
         (tmp_path / "visible.py").write_text("x = 1")
@@ -130,3 +118,133 @@ class TestWalkSourceFiles:
         files = _walk_source_files(tmp_path)
         names = {f.name for f in files}
         assert names == {"visible.py"}
+
+
+class TestIterChunkedFiles:
+    """Tests for the thread-pooled read-and-chunk pipeline."""
+
+    def test_preserves_input_order(self, tmp_path):
+        files = []
+        for i in range(50):
+            path = tmp_path / f"m{i:02d}.py"
+            path.write_text(f"x = {i}\n")
+            files.append(path)
+
+        results = list(_iter_chunked_files([(f, None) for f in files], chunk_size=1000, chunk_overlap=0))
+        assert [path for path, _, _ in results] == files
+        assert all(f"x = {i}" in chunks[0]["text"] for i, (_, _, chunks) in enumerate(results))
+
+    def test_blank_and_missing_files_yield_none(self, tmp_path):
+        blank = tmp_path / "blank.py"
+        blank.write_text("   \n")
+        missing = tmp_path / "missing.py"
+
+        results = {p: (h, c) for p, h, c in _iter_chunked_files([(blank, None), (missing, None)], 1000, 0)}
+        assert results[blank][0] is not None and results[blank][1] is None
+        assert results[missing] == (None, None)
+
+    def test_invalid_utf8_is_replaced(self, tmp_path):
+        path = tmp_path / "m.py"
+        path.write_bytes(b"x = '\xff'\n")
+
+        [(_, _, chunks)] = _iter_chunked_files([(path, None)], 1000, 0)
+        assert chunks[0]["text"] == "x = '\ufffd'"
+
+    def test_matching_hash_skips_chunking(self, tmp_path):
+        path = tmp_path / "m.py"
+        path.write_text("x = 1\n")
+        [(_, digest, _)] = _iter_chunked_files([(path, None)], 1000, 0)
+
+        with patch("memory_sidecar.flows.codebase.chunk_file") as mock_chunk:
+            [(_, again, chunks)] = _iter_chunked_files([(path, digest)], 1000, 0)
+        assert again == digest
+        assert chunks is None
+        mock_chunk.assert_not_called()
+
+
+def _fake_embed(texts):
+    return [[0.0] * 384 for _ in texts]
+
+
+class TestIndexCodebase:
+    """Tests for the index_codebase flow with a mocked embedder."""
+
+    @patch("memory_sidecar.flows.codebase.embed_texts", side_effect=_fake_embed)
+    def test_unchanged_files_skipped(self, mock_embed, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.py").write_text("def foo():\n    return 1\n")
+        (src / "b.py").write_text("def bar():\n    return 2\n")
+        db = str(tmp_path / "test.sqlite")
+
+        first = index_codebase(str(src), db)
+        mock_embed.reset_mock()
+        second = index_codebase(str(src), db)
+
+        assert first["chunks_indexed"] == 2
+        assert second["files_unchanged"] == 2
+        assert second["files_processed"] == 0
+        assert second["chunks_indexed"] == 0
+        mock_embed.assert_not_called()
+
+    @patch("memory_sidecar.flows.codebase.embed_texts", side_effect=_fake_embed)
+    def test_unchanged_chunks_in_edited_file_not_reembedded(self, mock_embed, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.py").write_text("def foo():\n    return 1\n\n\ndef bar():\n    return 2\n")
+        db = str(tmp_path / "test.sqlite")
+
+        first = index_codebase(str(src), db, chunk_size=30)
+        (src / "a.py").write_text("def foo():\n    return 1\n\n\ndef bar():\n    return 3\n")
+        mock_embed.reset_mock()
+        second = index_codebase(str(src), db, chunk_size=30)
+
+        assert first["chunks_indexed"] == 2
+        assert second["chunks_unchanged"] == 1
+        mock_embed.assert_called_once_with(["def bar():\n    return 3"])
+
+    @patch("memory_sidecar.flows.codebase.embed_texts", side_effect=_fake_embed)
+    def test_removed_chunks_deleted(self, mock_embed, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.py").write_text("def foo():\n    return 1\n\n\ndef bar():\n    return 2\n")
+        db = str(tmp_path / "test.sqlite")
+
+        index_codebase(str(src), db, chunk_size=30)
+        (src / "a.py").write_text("def foo():\n    return 1\n")
+        stats = index_codebase(str(src), db, chunk_size=30)
+
+        assert stats["chunks_deleted"] == 1
+        conn = sqlite3.connect(db)
+        assert conn.execute("SELECT location FROM code_chunks").fetchall() == [("0:0",)]
+
+    @patch("memory_sidecar.flows.codebase.embed_texts", side_effect=_fake_embed)
+    def test_chunk_size_change_rechunks(self, mock_embed, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.py").write_text("def foo():\n    return 1\n\n\ndef bar():\n    return 2\n")
+        db = str(tmp_path / "test.sqlite")
+
+        index_codebase(str(src), db)
+        stats = index_codebase(str(src), db, chunk_size=30)
+
+        assert stats["files_unchanged"] == 0
+        assert stats["files_processed"] == 1
+
+    @patch("memory_sidecar.flows.codebase.embed_texts", side_effect=_fake_embed)
+    def test_edited_chunk_reembedded(self, mock_embed, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.py").write_text("def foo():\n    return 1\n")
+        (src / "b.py").write_text("def bar():\n    return 2\n")
+        db = str(tmp_path / "test.sqlite")
+
+        index_codebase(str(src), db)
+        (src / "b.py").write_text("def bar():\n    return 3\n")
+        mock_embed.reset_mock()
+        stats = index_codebase(str(src), db)
+
+        assert stats["chunks_indexed"] == 1
+        mock_embed.assert_called_once_with(["def bar():\n    return 3"])
+        conn = sqlite3.connect(db)
+        assert conn.execute("SELECT code FROM code_chunks WHERE filename = 'b.py'").fetchone()[0].endswith("3")
@@ -11,6 +11,7 @@ from memory_sidecar.config import (
     EXCLUDED_PATTERNS,
     codebase_db_path,
     data_dir,
+    embed_threads,
     knowledge_db_path,
 )
 
@@ -27,6 +28,16 @@ class TestDataDir:
             assert result == Path("/custom/path")
 
 
+class TestEmbedThreads:
+    def test_default_is_none(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            assert embed_threads() is None
+
+    def test_respects_env_var(self):
+        with mock.patch.dict(os.environ, {"MEMORY_SIDECAR_EMBED_THREADS": "4"}):
+            assert embed_threads() == 4
+
+
 class TestCodebaseDbPath:
     def test_returns_sqlite_under_data_dir(self):
         with mock.patch.dict(os.environ, {"MEMORY_SIDECAR_DATA_DIR": "/tmp/test-mem"}):
@@ -2,43 +2,77 @@
 
 from __future__ import annotations
 
+import os
+import sqlite3
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import pytest
 
-from memory_sidecar.flows.documents import _should_include_doc, index_documents
+from memory_sidecar.flows import documents
+from memory_sidecar.flows.documents import _should_include_doc, _walk_doc_files, index_documents
+
+
+def _fake_convert(path: Path, fast: bool = False) -> str:
+    """Picklable stand-in for Docling, for the process-pool path."""
+    if path.stem == "corrupt":
+        raise RuntimeError("corrupt file")
+    return f"# {path.stem}\n\nContent of {path.name}."
+
+
+def _crashing_convert(path: Path, fast: bool = False) -> str:
+    """Picklable stand-in for Docling that kills its worker process on one document."""
+    if path.stem == "crash":
+        os._exit(1)
+    return _fake_convert(path, fast)
 
 
 class TestShouldIncludeDoc:
     """Tests for the _should_include_doc file filter."""
 
     def test_includes_pdf(self):
-        assert _should_include_doc(Path("report.pdf")) is True
+        assert _should_include_doc("report.pdf") is True
 
     def test_includes_docx(self):
-        assert _should_include_doc(Path("spec.docx")) is True
+        assert _should_include_doc("spec.docx") is True
 
     def test_includes_pptx(self):
-        assert _should_include_doc(Path("slides.pptx")) is True
+        assert _should_include_doc("slides.pptx") is True
 
     def test_includes_xlsx(self):
-        assert _should_include_doc(Path("data.xlsx")) is True
+        assert _should_include_doc("data.xlsx") is True
 
     def test_includes_html(self):
-        assert _should_include_doc(Path("page.html")) is True
+        assert _should_include_doc("page.html") is True
 
     def test_excludes_python(self):
-        assert _should_include_doc(Path("script.py")) is False
+        assert _should_include_doc("script.py") is False
 
     def test_excludes_markdown(self):
-        assert _should_include_doc(Path("readme.md")) is False
+        assert _should_include_doc("readme.md") is False
 
     def test_excludes_image(self):
-        assert _should_include_doc(Path("photo.png")) is False
+        assert _should_include_doc("photo.png") is False
 
     def test_case_insensitive(self):
-        assert _should_include_doc(Path("Report.PDF")) is True
+        assert _should_include_doc("Report.PDF") is True
+
+
+class TestWalkDocFiles:
+    """Tests for the scandir-based document walker."""
+
+    def test_selects_documents_by_suffix(self, tmp_path):
+        for rel in ("b.pdf", "a/x.DOCX", "a/notes.md", "a/b/deck.pptx", ".hidden/c.html", "a-c.xlsx"):
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x")
+        (tmp_path / "folder.pdf").mkdir()
+
+        expected = sorted(
+            tmp_path / rel for rel in ("b.pdf", "a/x.DOCX", "a/b/deck.pptx", ".hidden/c.html", "a-c.xlsx")
+        )
+        assert _walk_doc_files(tmp_path) == expected
 
 
 class TestConvertDocumentImportError:
@@ -53,6 +87,27 @@ class TestConvertDocumentImportError:
                 _convert_document(Path("test.pdf"))
 
 
+class TestConverterReuse:
+    def test_converter_built_once(self, monkeypatch):
+        from memory_sidecar.flows import documents
+
+        built = []
+
+        class FakeConverter:
+            def __init__(self):
+                built.append(self)
+
+            def convert(self, source):
+                return SimpleNamespace(document=SimpleNamespace(export_to_markdown=lambda: f"# {source}"))
+
+        fake_module = SimpleNamespace(DocumentConverter=FakeConverter)
+        monkeypatch.setattr(documents, "_converters", {})
+        with patch.dict("sys.modules", {"docling": SimpleNamespace(), "docling.document_converter": fake_module}):
+            assert documents._convert_document(Path("a.pdf")) == "# a.pdf"
+            assert documents._convert_document(Path("b.pdf")) == "# b.pdf"
+        assert len(built) == 1
+
+
 class TestIndexDocuments:
     """Tests for the index_documents flow with mocked Docling."""
 
@@ -121,3 +176,116 @@ class TestIndexDocuments:
 
         assert stats["files_processed"] == 0
         assert stats["files_skipped"] == 1
+
+    @patch("memory_sidecar.flows.documents._convert_document", _fake_convert)
+    @patch("memory_sidecar.flows.documents.embed_texts")
+    def test_process_pool_conversion(self, mock_embed, tmp_path):
+        """Parallel conversion keeps per-file results and failure accounting."""
+        for name in ("a.pdf", "b.docx", "corrupt.pdf", "c.html"):
+            (tmp_path / name).write_bytes(b"fake")
+        mock_embed.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+
+        db = str(tmp_path / "test.sqlite")
+        stats = index_documents(str(tmp_path), db, workers=2)
+
+        assert stats["files_processed"] == 3
+        assert stats["files_skipped"] == 1
+        conn = sqlite3.connect(db)
+        rows = conn.execute("SELECT filename, code FROM code_chunks ORDER BY filename").fetchall()
+        assert rows == [
+            ("a.pdf", "# a\n\nContent of a.pdf."),
+            ("b.docx", "# b\n\nContent of b.docx."),
+            ("c.html", "# c\n\nContent of c.html."),
+        ]
+
+    @patch("memory_sidecar.flows.documents._convert_document", _crashing_convert)
+    @patch("memory_sidecar.flows.documents.embed_texts")
+    def test_dead_worker_restarts_pool(self, mock_embed, tmp_path):
+        """A worker crash skips the conversions in flight and the rest still get indexed."""
+        names = ["crash.pdf"] + [f"d{i}.pdf" for i in range(8)]
+        for name in names:
+            (tmp_path / name).write_bytes(b"fake")
+        mock_embed.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+
+        db = str(tmp_path / "test.sqlite")
+        stats = index_documents(str(tmp_path), db, workers=2)
+
+        assert stats["files_skipped"] >= 1
+        assert stats["files_processed"] + stats["files_skipped"] == len(names)
+        conn = sqlite3.connect(db)
+        indexed = {row[0] for row in conn.execute("SELECT filename FROM code_chunks")}
+        assert {"d5.pdf", "d6.pdf", "d7.pdf"} <= indexed
+
+    @patch("memory_sidecar.flows.documents._convert_document")
+    @patch("memory_sidecar.flows.documents.embed_texts")
+    def test_unchanged_chunks_not_reembedded(self, mock_embed, mock_convert, tmp_path):
+        """Re-indexing a document only embeds chunks whose text changed."""
+        (tmp_path / "doc.pdf").write_bytes(b"fake")
+        first = "a" * 80 + "\n" + "b" * 80 + "\n"
+        mock_embed.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+        db = str(tmp_path / "test.sqlite")
+
+        mock_convert.return_value = first
+        index_documents(str(tmp_path), db, chunk_size=100, chunk_overlap=0)
+        mock_embed.reset_mock()
+        (tmp_path / "doc.pdf").write_bytes(b"fake, edited")
+        mock_convert.return_value = first.replace("b" * 80, "c" * 80)
+        stats = index_documents(str(tmp_path), db, chunk_size=100, chunk_overlap=0)
+
+        assert stats["chunks_unchanged"] == 1
+        assert stats["chunks_indexed"] == 1
+        mock_embed.assert_called_once_with(["c" * 80 + "\n"])
+
+    @patch("memory_sidecar.flows.documents._convert_document")
+    @patch("memory_sidecar.flows.documents.embed_texts")
+    def test_unchanged_documents_not_converted(self, mock_embed, mock_convert, tmp_path):
+        """Documents with unchanged bytes skip Docling; edited and failed ones are converted again."""
+        (tmp_path / "same.pdf").write_bytes(b"same")
+        (tmp_path / "edited.pdf").write_bytes(b"v1")
+        (tmp_path / "broken.pdf").write_bytes(b"broken")
+        mock_embed.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+
+        def convert(path, fast=False):
+            if path.name == "broken.pdf":
+                raise RuntimeError("corrupt file")
+            return f"# {path.name}"
+
+        mock_convert.side_effect = convert
+        db = str(tmp_path / "test.sqlite")
+        index_documents(str(tmp_path), db)
+        mock_convert.reset_mock()
+        (tmp_path / "edited.pdf").write_bytes(b"v2")
+
+        stats = index_documents(str(tmp_path), db)
+
+        assert sorted(c.args[0].name for c in mock_convert.call_args_list) == ["broken.pdf", "edited.pdf"]
+        assert stats["files_unchanged"] == 1
+        assert stats["files_processed"] == 1
+        assert stats["files_skipped"] == 1
+
+    @patch("memory_sidecar.flows.documents._convert_document")
+    @patch("memory_sidecar.flows.documents.embed_texts")
+    def test_chunk_settings_change_reconverts(self, mock_embed, mock_convert, tmp_path):
+        (tmp_path / "doc.pdf").write_bytes(b"fake")
+        mock_convert.return_value = "# Doc"
+        mock_embed.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+        db = str(tmp_path / "test.sqlite")
+
+        index_documents(str(tmp_path), db)
+        index_documents(str(tmp_path), db, chunk_size=500)
+
+        assert mock_convert.call_count == 2
+
+    @patch("memory_sidecar.flows.documents._convert_document")
+    @patch("memory_sidecar.flows.documents.embed_texts")
+    def test_chunker_version_change_reconverts(self, mock_embed, mock_convert, tmp_path, monkeypatch):
+        (tmp_path / "doc.pdf").write_bytes(b"fake")
+        mock_convert.return_value = "# Doc"
+        mock_embed.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+        db = str(tmp_path / "test.sqlite")
+
+        index_documents(str(tmp_path), db)
+        monkeypatch.setattr(documents, "CHUNKER_VERSION", "next")
+        index_documents(str(tmp_path), db)
+
+        assert mock_convert.call_count == 2
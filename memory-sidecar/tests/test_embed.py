@@ -0,0 +1,73 @@
+"""Tests for memory_sidecar.embed — batching and the embedding cache."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from memory_sidecar import embed
+from memory_sidecar.config import EMBED_BATCH_SIZE, EMBED_DIMENSIONS
+from memory_sidecar.embed import embed_one, embed_texts
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    embed._EMBED_CACHE.clear()
+    yield
+    embed._EMBED_CACHE.clear()
+
+
+def _fake_model() -> MagicMock:
+    model = MagicMock()
+    model.embed.side_effect = lambda texts, batch_size: (
+        np.full(EMBED_DIMENSIONS, len(t), dtype=np.float32) for t in texts
+    )
+    return model
+
+
+class TestEmbedTexts:
+    def test_empty_input(self):
+        result = embed_texts([])
+        assert result.shape == (0, EMBED_DIMENSIONS)
+
+    def test_returns_float32_rows_in_order(self):
+        model = _fake_model()
+        with patch.object(embed, "_get_model", return_value=model):
+            result = embed_texts(["a", "bbb"])
+        assert result.dtype == np.float32
+        assert result[:, 0].tolist() == [1.0, 3.0]
+
+    def test_sorted_by_length_for_model_but_returned_in_input_order(self):
+        model = _fake_model()
+        with patch.object(embed, "_get_model", return_value=model):
+            result = embed_texts(["ccc", "a", "bb"])
+        model.embed.assert_called_once_with(["a", "bb", "ccc"], batch_size=EMBED_BATCH_SIZE)
+        assert result[:, 0].tolist() == [3.0, 1.0, 2.0]
+
+    def test_duplicate_texts_embedded_once(self):
+        model = _fake_model()
+        with patch.object(embed, "_get_model", return_value=model):
+            result = embed_texts(["xx", "y", "xx", "xx"])
+        model.embed.assert_called_once_with(["y", "xx"], batch_size=EMBED_BATCH_SIZE)
+        assert result[:, 0].tolist() == [2.0, 1.0, 2.0, 2.0]
+
+    def test_cached_texts_skip_model(self):
+        model = _fake_model()
+        with patch.object(embed, "_get_model", return_value=model):
+            embed_texts(["a", "bb"])
+            model.embed.reset_mock()
+            result = embed_texts(["bb", "ccc"])
+        model.embed.assert_called_once_with(["ccc"], batch_size=EMBED_BATCH_SIZE)
+        assert result[:, 0].tolist() == [2.0, 3.0]
+
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(embed, "_EMBED_CACHE_SIZE", 2)
+        with patch.object(embed, "_get_model", return_value=_fake_model()):
+            embed_texts(["a", "b", "c"])
+        assert len(embed._EMBED_CACHE) == 2
+
+    def test_embed_one_returns_row(self):
+        with patch.object(embed, "_get_model", return_value=_fake_model()):
+            assert embed_one("abcd").shape == (EMBED_DIMENSIONS,)
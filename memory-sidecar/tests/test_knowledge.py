@@ -0,0 +1,36 @@
+"""Tests for memory_sidecar.flows.knowledge — store/query against a database file."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from memory_sidecar.config import EMBED_DIMENSIONS
+from memory_sidecar.flows import knowledge
+from memory_sidecar.flows.knowledge import query, store
+
+
+@pytest.fixture(autouse=True)
+def _fake_embed():
+    with patch.object(knowledge, "embed_one", return_value=np.ones(EMBED_DIMENSIONS, dtype=np.float32)):
+        yield
+
+
+class TestStoreQuery:
+    def test_store_then_query(self, tmp_path):
+        db = str(tmp_path / "k.sqlite")
+        row_id = store(db, "retry network calls", "pattern")
+
+        assert row_id == 1
+        assert [r["id"] for r in query(db, "retry")] == [1]
+
+    def test_deleted_database_recreated_on_next_store(self, tmp_path):
+        db = tmp_path / "k.sqlite"
+        store(str(db), "first", "pattern")
+        db.unlink()
+
+        assert store(str(db), "second", "pattern") == 1
+        assert db.exists()
+        assert [r["content"] for r in query(str(db), "second")] == ["second"]
@@ -3,13 +3,18 @@
 from __future__ import annotations
 
 import sqlite3
-import struct
+from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
+from memory_sidecar import storage
+from memory_sidecar.config import EMBED_DIMENSIONS
 from memory_sidecar.storage import (
-    _serialize_vec,
-    delete_stale_chunks,
+    _ensure_vec,
+    _quantize_vecs,
+    connect,
+    delete_chunks_by_id,
     get_metadata,
     init_codebase_schema,
     init_knowledge_schema,
@@ -18,37 +23,57 @@ from memory_sidecar.storage import (
     purge_all_code_chunks,
     search_code,
     search_knowledge,
+    search_knowledge_fts,
+    search_knowledge_hybrid,
     set_metadata,
     upsert_code_chunk,
+    upsert_code_chunks,
 )
 
 
-class TestSerializeVec:
-    def test_round_trip(self):
-        vec = [1.0, 2.5, -3.0, 0.0, 4.125]
-        serialized = _serialize_vec(vec)
+class TestQuantizeVecs:
+    def test_normalizes_and_scales_to_int8(self):
+        q = _quantize_vecs([[3.0, 4.0], [0.0, -2.0]])
+        assert q.dtype == np.int8
+        assert q.tolist() == [[76, 102], [0, -127]]
 
-        # Deserialize manually
-        count = len(serialized) // 4
-        deserialized = list(struct.unpack(f"{count}f", serialized))
+    def test_single_vector(self):
+        assert _quantize_vecs(np.array([1.0, 0.0])).shape == (1, 2)
 
-        assert deserialized == vec
+    def test_zero_vector_stays_zero(self):
+        assert _quantize_vecs([[0.0, 0.0]]).tolist() == [[0, 0]]
 
-    def test_output_size(self):
-        vec = [0.0] * 384  # EMBED_DIMENSIONS
-        serialized = _serialize_vec(vec)
-        assert len(serialized) == 384 * 4  # 4 bytes per float32
 
-    def test_empty_vector(self):
-        vec: list[float] = []
-        serialized = _serialize_vec(vec)
-        assert serialized == b""
+class TestConnect:
+    def test_failed_vec_load_not_retried(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage, "_vec_unavailable", False)
+        with patch.dict("sys.modules", {"sqlite_vec": None}):
+            connect(tmp_path / "a.sqlite").close()
+        assert storage._vec_unavailable is True
 
-    def test_single_element(self):
-        vec = [42.0]
-        serialized = _serialize_vec(vec)
-        deserialized = struct.unpack("1f", serialized)
-        assert deserialized[0] == 42.0
+        fake_vec = MagicMock()
+        with patch.dict("sys.modules", {"sqlite_vec": fake_vec}):
+            connect(tmp_path / "b.sqlite").close()
+        fake_vec.load.assert_not_called()
+
+    def test_new_database_pragmas(self, tmp_path):
+        conn = connect(tmp_path / "sub" / "new.sqlite")
+        init_codebase_schema(conn)
+        assert conn.execute("PRAGMA page_size").fetchone()[0] == 8192
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+        conn.close()
+
+    def test_existing_database_page_size_kept(self, tmp_path):
+        path = tmp_path / "old.sqlite"
+        legacy = sqlite3.connect(str(path))
+        legacy.execute("CREATE TABLE t (x)")
+        legacy.commit()
+        legacy.close()
+
+        conn = connect(path)
+        assert conn.execute("PRAGMA page_size").fetchone()[0] == 4096
+        conn.close()
 
 
 class TestInitCodebaseSchema:
@@ -60,14 +85,18 @@ class TestInitCodebaseSchema:
         tables = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='code_chunks'").fetchall()
         assert len(tables) == 1
 
-    def test_creates_filename_index(self):
+    def test_filename_lookups_use_unique_index(self):
         conn = sqlite3.connect(":memory:")
         init_codebase_schema(conn)
+        conn.execute("CREATE INDEX idx_code_chunks_filename ON code_chunks(filename)")  # as older databases have
+        init_codebase_schema(conn)
 
         indexes = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='index' AND name='idx_code_chunks_filename'"
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='code_chunks'"
         ).fetchall()
-        assert len(indexes) == 1
+        assert indexes == [("sqlite_autoindex_code_chunks_1",)]
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM code_chunks WHERE filename = ?", ("f.py",)).fetchall()
+        assert "sqlite_autoindex_code_chunks_1" in plan[0][3]
 
     def test_idempotent(self):
         conn = sqlite3.connect(":memory:")
@@ -108,60 +137,60 @@ class TestInitKnowledgeSchema:
         assert len(indexes) == 1
 
 
-class TestDeleteStaleChunks:
+class TestDeleteChunksById:
     def _setup_db(self) -> sqlite3.Connection:
         conn = sqlite3.connect(":memory:")
         init_codebase_schema(conn)
         # Insert some test chunks (skip vec table since _has_vec is False in test)
-        for loc in ["0:0", "1:100", "2:200"]:
-            conn.execute(
-                "INSERT INTO code_chunks (filename, location, language, code, updated_at) "
-                "VALUES (?, ?, 'python', 'code', '2024-01-01')",
-                ("test.py", loc),
-            )
+        conn.executemany(
+            "INSERT INTO code_chunks (filename, location, language, code, updated_at) "
+            "VALUES (?, ?, 'python', 'code', '2024-01-01')",
+            [("test.py", loc) for loc in ("0:0", "1:100", "2:200")],
+        )
         conn.commit()
         return conn
 
-    def test_deletes_chunks_not_in_keep_set(self):
+    def test_delete_chunks_by_id(self):
         conn = self._setup_db()
+        ids = [r[0] for r in conn.execute("SELECT id FROM code_chunks WHERE location != '0:0'")]
 
-        # Keep only "0:0", delete "1:100" and "2:200"
-        deleted = delete_stale_chunks(conn, "test.py", {"0:0"})
+        deleted = delete_chunks_by_id(conn, ids)
 
         assert deleted == 2
-        remaining = conn.execute("SELECT location FROM code_chunks WHERE filename='test.py'").fetchall()
-        assert len(remaining) == 1
-        assert remaining[0][0] == "0:0"
+        remaining = conn.execute("SELECT location FROM code_chunks").fetchall()
+        assert remaining == [("0:0",)]
+        assert delete_chunks_by_id(conn, []) == 0
 
-    def test_empty_keep_set_deletes_all(self):
-        conn = self._setup_db()
 
-        deleted = delete_stale_chunks(conn, "test.py", set())
+class TestUpsertCodeChunks:
+    """Tests for the batched code chunk upsert."""
 
-        assert deleted == 3
-        remaining = conn.execute("SELECT location FROM code_chunks WHERE filename='test.py'").fetchall()
-        assert len(remaining) == 0
+    def _setup_db(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(":memory:")
+        init_codebase_schema(conn)
+        return conn
 
-    def test_all_kept_deletes_none(self):
+    def test_inserts_batch(self):
         conn = self._setup_db()
+        rows = [("a.py", "0:0", "python", "a"), ("b.py", "0:0", "python", "b")]
+        upsert_code_chunks(conn, rows, [[0.0] * 10] * 2)
 
-        deleted = delete_stale_chunks(conn, "test.py", {"0:0", "1:100", "2:200"})
+        stored = conn.execute("SELECT filename, location, language, code FROM code_chunks ORDER BY id").fetchall()
+        assert stored == rows
 
-        assert deleted == 0
-
-    def test_different_filename_not_affected(self):
+    def test_updates_existing_rows_in_place(self):
         conn = self._setup_db()
-        conn.execute(
-            "INSERT INTO code_chunks (filename, location, language, code, updated_at) "
-            "VALUES ('other.py', '0:0', 'python', 'code', '2024-01-01')"
-        )
-        conn.commit()
+        upsert_code_chunks(conn, [("a.py", "0:0", "python", "old")], [[0.0] * 10])
+        first_id = conn.execute("SELECT id FROM code_chunks").fetchone()[0]
 
-        deleted = delete_stale_chunks(conn, "test.py", set())
+        upsert_code_chunks(conn, [("a.py", "0:0", "python", "new")], [[0.0] * 10])
 
-        assert deleted == 3
-        remaining = conn.execute("SELECT COUNT(*) FROM code_chunks WHERE filename='other.py'").fetchone()
-        assert remaining[0] == 1  # other.py untouched
+        assert conn.execute("SELECT id, code FROM code_chunks").fetchall() == [(first_id, "new")]
+
+    def test_commits_batch(self):
+        conn = self._setup_db()
+        upsert_code_chunks(conn, [("a.py", "0:0", "python", "a")], [[0.0] * 10])
+        assert not conn.in_transaction
 
 
 class TestVecUnavailableGuards:
@@ -202,14 +231,55 @@ class TestVecUnavailableGuards:
         results = search_knowledge(conn, [0.0] * 10)
         assert results == []
 
-    def test_delete_stale_chunks_without_vec(self):
+    def test_delete_chunks_by_id_without_vec(self):
         conn = self._setup_codebase_db()
         upsert_code_chunk(conn, "f.py", "0:0", "python", "code", [0.0] * 10)
         conn.commit()
-        deleted = delete_stale_chunks(conn, "f.py", set())
+        ids = [r[0] for r in conn.execute("SELECT id FROM code_chunks")]
+        deleted = delete_chunks_by_id(conn, ids)
         assert deleted == 1
 
 
+class TestSearchKnowledgeFts:
+    def _setup_db(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(":memory:")
+        init_knowledge_schema(conn)
+        insert_knowledge(conn, "retry the flaky network call", "pattern", None, [0.0] * 10)
+        insert_knowledge(conn, "network timeouts hide real errors", "pitfall", None, [0.0] * 10)
+        conn.commit()
+        return conn
+
+    def test_without_category(self):
+        results = search_knowledge_fts(self._setup_db(), "network")
+        assert sorted(r["category"] for r in results) == ["pattern", "pitfall"]
+
+    def test_with_category(self):
+        results = search_knowledge_fts(self._setup_db(), "network", category="pitfall")
+        assert [r["content"] for r in results] == ["network timeouts hide real errors"]
+
+    def test_empty_category_means_no_filter(self):
+        assert len(search_knowledge_fts(self._setup_db(), "network", category="")) == 2
+
+    def test_tokens_match_in_any_order(self):
+        results = search_knowledge_fts(self._setup_db(), "errors timeouts")
+        assert [r["content"] for r in results] == ["network timeouts hide real errors"]
+
+    def test_phrase_requires_adjacent_tokens(self):
+        conn = self._setup_db()
+        assert search_knowledge_fts(conn, "errors timeouts", phrase=True) == []
+        assert len(search_knowledge_fts(conn, "real errors", phrase=True)) == 1
+
+    def test_query_syntax_is_escaped(self):
+        conn = self._setup_db()
+        for text in ('network"', "network*", "category:pattern", "NOT network", "", "   "):
+            search_knowledge_fts(conn, text)  # should not raise
+
+    def test_hybrid_without_vec_ranks_fts_hits(self):
+        results = search_knowledge_hybrid(self._setup_db(), [0.0] * 10, "network", top_k=1)
+        assert len(results) == 1
+        assert results[0]["relevance"] == pytest.approx(1.0 / 61)
+
+
 class TestMetadata:
     """Tests for the metadata key-value table."""
 
@@ -243,12 +313,11 @@ class TestPurgeAllCodeChunks:
     def test_purges_all_rows(self):
         conn = sqlite3.connect(":memory:")
         init_codebase_schema(conn)
-        for loc in ["0:0", "1:100", "2:200"]:
-            conn.execute(
-                "INSERT INTO code_chunks (filename, location, language, code, updated_at) "
-                "VALUES (?, ?, 'python', 'code', '2024-01-01')",
-                ("test.py", loc),
-            )
+        conn.executemany(
+            "INSERT INTO code_chunks (filename, location, language, code, updated_at) "
+            "VALUES (?, ?, 'python', 'code', '2024-01-01')",
+            [("test.py", loc) for loc in ("0:0", "1:100", "2:200")],
+        )
         conn.commit()
 
         purged = purge_all_code_chunks(conn)
@@ -264,13 +333,190 @@ class TestPurgeAllCodeChunks:
     def test_purges_multiple_files(self):
         conn = sqlite3.connect(":memory:")
         init_codebase_schema(conn)
-        for fn in ["a.py", "b.py"]:
-            conn.execute(
-                "INSERT INTO code_chunks (filename, location, language, code, updated_at) "
-                "VALUES (?, '0:0', 'python', 'code', '2024-01-01')",
-                (fn,),
-            )
+        conn.executemany(
+            "INSERT INTO code_chunks (filename, location, language, code, updated_at) "
+            "VALUES (?, '0:0', 'python', 'code', '2024-01-01')",
+            [(fn,) for fn in ("a.py", "b.py")],
+        )
         conn.commit()
 
         purged = purge_all_code_chunks(conn)
         assert purged == 2
+
+
+class TestVecInt8:
+    """Vector storage round trips; skipped where sqlite3 cannot load sqlite-vec."""
+
+    def _vec_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(":memory:")
+        if not _ensure_vec(conn):
+            pytest.skip("sqlite-vec extension not loadable")
+        return conn
+
+    def test_search_ranks_nearest_first(self):
+        conn = self._vec_conn()
+        init_codebase_schema(conn)
+        embeddings = np.eye(3, EMBED_DIMENSIONS, dtype=np.float32)
+        upsert_code_chunks(conn, [("a.py", f"{i}:0", "python", f"c{i}") for i in range(3)], embeddings)
+
+        results = search_code(conn, embeddings[1] + 0.1 * embeddings[2], top_k=2)
+
+        assert [r["code"] for r in results] == ["c1", "c2"]
+        assert results[0]["score"] == pytest.approx(1.0, abs=0.01)
+
+    def test_migrates_float_table_in_place(self):
+        conn = self._vec_conn()
+        conn.execute(
+            "CREATE VIRTUAL TABLE code_chunks_vec USING vec0("
+            f"id INTEGER PRIMARY KEY, embedding FLOAT[{EMBED_DIMENSIONS}])"
+        )
+        vec = np.zeros(EMBED_DIMENSIONS, dtype=np.float32)
+        vec[5] = 0.5
+        conn.execute("INSERT INTO code_chunks_vec (id, embedding) VALUES (7, ?)", (vec.tobytes(),))
+
+        init_codebase_schema(conn)
+
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'code_chunks_vec'").fetchone()[0]
+        assert "INT8[" in sql
+        stored = conn.execute("SELECT id, embedding FROM code_chunks_vec").fetchall()
+        assert [row_id for row_id, _ in stored] == [7]
+        assert np.frombuffer(stored[0][1], dtype=np.int8)[5] == 127
+
+    def test_failed_float_migration_keeps_old_table(self):
+        conn = self._vec_conn()
+        conn.execute(
+            "CREATE VIRTUAL TABLE code_chunks_vec USING vec0("
+            f"id INTEGER PRIMARY KEY, embedding FLOAT[{EMBED_DIMENSIONS}])"
+        )
+        vec = np.ones(EMBED_DIMENSIONS, dtype=np.float32)
+        conn.execute("INSERT INTO code_chunks_vec (id, embedding) VALUES (7, ?)", (vec.tobytes(),))
+
+        with (
+            patch.object(storage, "_replace_code_vecs", side_effect=sqlite3.OperationalError("disk I/O error")),
+            pytest.raises(sqlite3.OperationalError),
+        ):
+            init_codebase_schema(conn)
+
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'code_chunks_vec'").fetchone()[0]
+        assert "FLOAT[" in sql
+        assert conn.execute("SELECT id FROM code_chunks_vec").fetchall() == [(7,)]
+
+    def test_knowledge_search_and_migration(self):
+        conn = self._vec_conn()
+        conn.execute(
+            "CREATE VIRTUAL TABLE knowledge_vec USING vec0("
+            f"id INTEGER PRIMARY KEY, embedding FLOAT[{EMBED_DIMENSIONS}])"
+        )
+        legacy = np.full(EMBED_DIMENSIONS, -1.0, dtype=np.float32)
+        conn.execute("INSERT INTO knowledge_vec (id, embedding) VALUES (99, ?)", (legacy.tobytes(),))
+        conn.execute(
+            "CREATE TABLE knowledge (id INTEGER PRIMARY KEY AUTOINCREMENT, content TEXT NOT NULL, "
+            "category TEXT NOT NULL, tags TEXT, stored_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO knowledge (id, content, category, stored_at, updated_at) VALUES (99, 'old', 'pattern', '', '')"
+        )
+        init_knowledge_schema(conn)
+        embeddings = np.eye(2, EMBED_DIMENSIONS, dtype=np.float32)
+        insert_knowledge(conn, "first", "pattern", None, embeddings[0])
+        insert_knowledge(conn, "second", "pitfall", None, embeddings[1])
+
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'knowledge_vec'").fetchone()[0]
+        assert "INT8[" in sql
+        assert conn.execute("SELECT COUNT(*) FROM knowledge_vec").fetchone()[0] == 3
+        results = search_knowledge(conn, embeddings[1], top_k=2)
+        assert [r["content"] for r in results] == ["second", "first"]
+        assert results[0]["relevance"] == pytest.approx(1.0, abs=0.01)
+
+    def test_hybrid_keeps_entries_with_shared_prefix(self):
+        conn = self._vec_conn()
+        init_knowledge_schema(conn)
+        prefix = "x" * 80
+        vec = np.eye(1, EMBED_DIMENSIONS, dtype=np.float32)[0]
+        first = insert_knowledge(conn, prefix + " alpha", "pattern", None, vec)
+        second = insert_knowledge(conn, prefix + " beta", "pattern", None, vec)
+        conn.execute("UPDATE knowledge SET stored_at = '2024-01-01T00:00:00+00:00'")
+
+        results = search_knowledge_hybrid(conn, vec, "alpha", top_k=5)
+
+        assert sorted(r["id"] for r in results) == [first, second]
+        assert results[0]["id"] == first
+
+    def test_category_filter_runs_inside_knn(self):
+        conn = self._vec_conn()
+        init_knowledge_schema(conn)
+        query = np.eye(1, EMBED_DIMENSIONS, dtype=np.float32)[0]
+        for _ in range(10):
+            insert_knowledge(conn, "common", "pattern", None, query)
+        far = np.eye(2, EMBED_DIMENSIONS, dtype=np.float32)[1]
+        insert_knowledge(conn, "rare one", "pitfall", None, far)
+        insert_knowledge(conn, "rare two", "pitfall", None, far)
+
+        results = search_knowledge(conn, query, category="pitfall", top_k=2)
+
+        assert sorted(r["content"] for r in results) == ["rare one", "rare two"]
+
+    def test_adds_category_to_existing_int8_table(self):
+        conn = self._vec_conn()
+        init_knowledge_schema(conn)
+        conn.execute("DROP TABLE knowledge_vec")
+        conn.execute(
+            "CREATE VIRTUAL TABLE knowledge_vec USING vec0("
+            f"id INTEGER PRIMARY KEY, embedding INT8[{EMBED_DIMENSIONS}] distance_metric=cosine)"
+        )
+        conn.execute(
+            "INSERT INTO knowledge (id, content, category, stored_at, updated_at) VALUES (5, 'kept', 'pitfall', '', '')"
+        )
+        vec = np.eye(1, EMBED_DIMENSIONS, dtype=np.float32)[0]
+        conn.execute(
+            "INSERT INTO knowledge_vec (id, embedding) VALUES (5, vec_int8(?))", (_quantize_vecs(vec)[0].tobytes(),)
+        )
+
+        init_knowledge_schema(conn)
+
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'knowledge_vec'").fetchone()[0]
+        assert "category" in sql
+        results = search_knowledge(conn, vec, category="pitfall", top_k=1)
+        assert [r["id"] for r in results] == [5]
+
+    def test_failed_category_migration_keeps_old_table(self):
+        conn = self._vec_conn()
+        init_knowledge_schema(conn)
+        conn.execute("DROP TABLE knowledge_vec")
+        conn.execute(
+            "CREATE VIRTUAL TABLE knowledge_vec USING vec0("
+            f"id INTEGER PRIMARY KEY, embedding INT8[{EMBED_DIMENSIONS}] distance_metric=cosine)"
+        )
+        vec = np.eye(1, EMBED_DIMENSIONS, dtype=np.float32)[0]
+        conn.execute(
+            "INSERT INTO knowledge_vec (id, embedding) VALUES (5, vec_int8(?))", (_quantize_vecs(vec)[0].tobytes(),)
+        )
+        # A NULL category cannot go into the vec0 metadata column, so the re-insert fails mid-migration.
+        conn.execute("DROP TABLE knowledge")
+        conn.execute(
+            "CREATE TABLE knowledge (id INTEGER PRIMARY KEY, content TEXT, category TEXT, "
+            "tags TEXT, stored_at TEXT, updated_at TEXT)"
+        )
+        conn.execute("INSERT INTO knowledge (id, content) VALUES (5, 'kept')")
+
+        with pytest.raises(sqlite3.Error):
+            init_knowledge_schema(conn)
+
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'knowledge_vec'").fetchone()[0]
+        assert "category" not in sql
+        assert conn.execute("SELECT id FROM knowledge_vec").fetchall() == [(5,)]
+
+    def test_hybrid_fuses_both_lists(self):
+        conn = self._vec_conn()
+        init_knowledge_schema(conn)
+        vecs = np.eye(3, EMBED_DIMENSIONS, dtype=np.float32)
+        both = insert_knowledge(conn, "retry with backoff", "pattern", None, vecs[0])
+        vec_only = insert_knowledge(conn, "unrelated words", "pattern", None, vecs[0] + 0.1 * vecs[1])
+        fts_only = insert_knowledge(conn, "retry forever", "pattern", None, vecs[2])
+        insert_knowledge(conn, "retry in a pitfall", "pitfall", None, vecs[0])
+
+        results = search_knowledge_hybrid(conn, vecs[0], "retry", category="pattern", top_k=3)
+
+        assert results[0]["id"] == both
+        assert {r["id"] for r in results} == {both, vec_only, fts_only}
+        assert results[0]["relevance"] > results[1]["relevance"]